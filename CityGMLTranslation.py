@@ -29,134 +29,15 @@
 # THE SOFTWARE.
 
 import markup3dmodule as m3dm
+import copy
+import re
+from lxml import etree
 from decimal import Decimal, getcontext
 import numpy as np
 
 # Setting the precision of Decimal
 getcontext().prec = 28
 
-def performStableAddition(number1, number2):
-    # Input: string number1, string number 2, output: string sum
-    # Determine the number of positions after the comma.
-    # print("Number 1 totally before: ", number1)
-    # print("Number 2 totally before: ", number2)
-
-    try:
-        n_after_comma_number1 = len(number1.split(".")[1])
-    except:
-        n_after_comma_number1 = 0
-    try:
-        n_after_comma_number2 = len(number2.split(".")[1])
-    except:
-        n_after_comma_number2 = 0
-    lengths = [n_after_comma_number1, n_after_comma_number2]
-
-    # convert float numbers into integers by removing the comma
-    # print("Number 1 before all: ", number1)
-    # print("Number 2 before all: ", number2)
-    number1 = number1.replace(".", "")
-    number2 = number2.replace(".", "")
-
-    # print("Number 1 after: ", number1)
-    # print("Number 2 after: ", number2)
-
-    # find the number with more positions after the comma
-    abs_lengths = np.abs(lengths)  # Erstellen eines Arrays mit den Beträgen
-    max_index = np.argmax(abs_lengths)
-
-    # Distinguish the two different cases
-    # Case 1: number one has more positions after the comma than number two
-    if max_index == 0:
-        # Find the difference of positions after the comma
-        n_positions_difference = (lengths[0] - lengths[1])
-        # print("n_positions_difference: ", n_positions_difference)
-        # Fill up the missing digits of number 2 with zeros
-        # print("number2 before: ", number2)
-        for i in range(n_positions_difference):
-            number2 = number2 + "0"
-        # print("number2_after", number2)
-        # print("Number1: ", number1)
-        # convert both stings into integers
-        number1_int = np.double(number1)
-        number2_int = np.double(number2)
-
-        # Add both numbers
-        number_sum = number1_int + number2_int
-
-        # convert back into string
-        format_string = "{:.0f}"
-        number_sum_string = format_string.format(number_sum)
-
-        # Insert the comma at the correct position
-        length_of_number = len(number_sum_string.replace("-",
-                                                         ""))
-        if length_of_number >= lengths[max_index]:
-            if n_after_comma_number1 != 0:
-                number_sum_string = number_sum_string[:-(lengths[0])] + "." + number_sum_string[-(lengths[0]):]
-                return number_sum_string
-            else:
-                number_sum_string = number_sum_string
-                return number_sum_string
-        elif length_of_number < n_after_comma_number1:
-            new_string = ""
-            for i in range(len(number_sum_string)):
-                if number_sum_string[i] == "-":
-                    new_string += "0."
-                else:
-                    new_string += number_sum_string[i]
-            number_sum_string = new_string
-            return number_sum_string
-        else:
-            number_sum_string = number_sum_string
-            return number_sum_string
-
-    # Case 2: number two has more positions after the comma than number one
-    else:
-        # find the difference of positions after the comma
-        n_positions_difference = lengths[1] - lengths[0]
-
-        # Fill up the missing digits of number 2 with zeros
-        for i in range(n_positions_difference):
-            number1 = number1 + "0"
-
-        # convert both stings into integers
-        number1_int = Decimal(number1)
-        number2_int = Decimal(number2)
-
-        # Add both numbers
-        number_sum = number1_int + number2_int
-
-        # convert back into string
-        format_string = "{:.0f}"
-        number_sum_string = format_string.format(number_sum)
-
-        # Insert the comma at the correct position
-        length_of_number = len(number_sum_string.replace("-",
-                                                         ""))
-        if length_of_number > n_after_comma_number2:
-            if n_after_comma_number2 != 0:
-
-                number_sum_string = number_sum_string[:-(lengths[1])] + "." + number_sum_string[-(lengths[1]):]
-                return number_sum_string
-
-            else:
-                number_sum_string = number_sum_string
-                return number_sum_string
-
-        elif length_of_number < n_after_comma_number2:
-            new_string = ""
-            for i in range(len(number_sum_string)):
-                if number_sum_string[i] == "-":
-                    new_string += "0."
-                else:
-                    new_string += number_sum_string[i]
-            number_sum_string = new_string
-            return number_sum_string
-        else:
-            number_sum_string = number_sum_string
-            return number_sum_string
-
-
 # This function is used in order to extract all the envelopes from the CityGML-File
 # These envelopes are going to be used in order to determine the translation parameters later
 def getEnvelopes(root, ns_bldg, ns_gml, ns_citygml):
@@ -197,119 +78,172 @@ def getTranslationParameters(envelopes, ns_gml):
     return [Decimal(str(int(dxret))), Decimal(str(int(dyret)))]
 
 
-# This function is used to Parse the text from the CityGML file to Decimal numbers and
-# to aplly the previously calculated translation parameters
-# Notice: this code only allows ONE "gml:PosList-Element" for each Interior and exterior of a Polygon
-# If there are more than just one,just the first one is going to be transformed
-def splitAndApplyTrafo(coordString, transParam):
-    # Splitting the coordinate string by empty spaces
-    split = coordString.split(" ")
-    alalala = len(split)
-    # Apply the Trafo
-    if split[0] == '':
-        split.pop(0)
-    if split[-1] == "":
-        split.pop(-1)
-    counter = 0
-    length = int(len(split))
-    length_new = int(length / 3)
-    for i in range(length_new):
-
-
-        # print("y")
-        split[counter] = performStableAddition(split[counter], str(transParam[1]))
-        # print("x")
-        split[counter + 1] = performStableAddition(split[counter + 1], str(transParam[0]))
-        # print("z")
-        split[counter + 2] = performStableAddition(split[counter + 2], str(transParam[2]))
-
-        counter += 3
-    # converting back to a string
-    translated = ""
-    for i in split:
-        if len(translated) == 0:
-            translated = str(i)
-        else:
-            translated = translated + " " + str(i)
+# Splits a Decimal into the integer of its digits and the number of positions after the comma
+def fixedPoint(number):
+    sign, digits, exponent = Decimal(number).as_tuple()
+    decimals = max(-exponent, 0)
+    value = int(Decimal(number).scaleb(decimals))
+    return value, decimals
+
+
+# Maximum number of digits of a coordinate and of an offset once they are brought to the same number of positions
+# after the comma, so that both and their sum fit into an int64 (below 2 * 10^18 < 2^63)
+MAXDIGITS = 18
+
+# Coordinates which are plain decimal numbers
+PLAINNUMBERS = re.compile(r'(?:[-+]?(?:\d+\.?\d*|\.\d+)(?: |\Z))*\Z')
+
+
+# This is the engine of the translation: the coordinates of a whole <gml:posList> (or <gml:pos>) are parsed into
+# an int64 array of their digits (scaled by the number of positions after the comma), the scaled offsets are added
+# to them, and the sums are formatted back with the same number of positions after the comma, so the result
+# is decimal-exact. Coordinates that are not plain decimal numbers are added one by one with Decimal.
+# offsets are the (digits, positions after the comma) of the parameters of the three coordinates, see fixedPoint
+def translateCoordinates(coordString, offsets):
+    split = coordString.split()
+    # -- Only whole points are translated
+    n = len(split) - len(split) % 3
+    if n == 0:
+        return " ".join(split)
+    text = " ".join(split[:n])
+    if not PLAINNUMBERS.match(text):
+        return translateCoordinatesDecimal(split, offsets)
+    # -- Number of positions after the comma and number of digits before it of each coordinate
+    decimals = np.array([len(t) - t.find(".") - 1 if "." in t else 0 for t in split[:n]], dtype=np.int64)
+    integers = np.array([len(t.lstrip("+-").split(".")[0]) for t in split[:n]], dtype=np.int64)
+    offsetDecimals = np.tile(np.array([o[1] for o in offsets], dtype=np.int64), n // 3)
+    offsetIntegers = np.tile(np.array([max(len(str(abs(o[0]))) - o[1], 1) for o in offsets], dtype=np.int64), n // 3)
+    # -- Both are brought to the larger number of positions after the comma, and they have to fit into an int64
+    scale = np.maximum(decimals, offsetDecimals)
+    if max((integers + scale).max(), (offsetIntegers + scale).max()) > MAXDIGITS:
+        return translateCoordinatesDecimal(split, offsets)
+    digits = np.fromstring(text.replace(".", ""), dtype=np.int64, sep=" ")
+    offsetValues = np.tile(np.array([o[0] for o in offsets], dtype=np.int64), n // 3)
+    sums = digits * 10 ** (scale - decimals) + offsetValues * 10 ** (scale - offsetDecimals)
+    # -- Format the sums in one pass
+    integer, fraction = np.divmod(np.abs(sums), 10 ** scale)
+    translated = " ".join([
+        ("-" if negative else "") + ("%d.%0*d" % (i, d, f) if d > 0 else "%d" % i)
+        for negative, i, f, d in zip((sums < 0).tolist(), integer.tolist(), fraction.tolist(), scale.tolist())])
+    if n < len(split):
+        translated = translated + " " + " ".join(split[n:])
     return translated
 
 
+def translateCoordinatesDecimal(split, offsets):
+    translated = []
+    for counter in range(len(split)):
+        if counter < len(split) - len(split) % 3:
+            value, decimals = offsets[counter % 3]
+            number = Decimal(split[counter]) + Decimal(value).scaleb(-decimals)
+            translated.append(str(number))
+        else:
+            translated.append(split[counter])
+    return " ".join(translated)
+
+
 # This code is used in order to find all the coordinates that are defined in the CityGML-File
 # Please Notice: the search for coordinates here has the same limitations as the search for coordinates that
 # is used in the "CityGML2OBJ" functionality!
 def appyTranslationToCityGML(CITYGML, root, transParam, ns_citygml, ns_gml, ns_frn, ns_veg, filename):
+    # The parameters are converted for the translation engine once
+    offsets = [fixedPoint(transParam[1]), fixedPoint(transParam[0]), fixedPoint(transParam[2])]
     # Iterate over all the cityObjectMembers
     for obj in root.getiterator('{%s}cityObjectMember' % ns_citygml):
-        # Iterate over all the children of cityObject Member
-        for child in obj.getchildren():
-            # Exclude all the implicitly referenced objects from the transformation
-            if child.findall(
-                    './/{%s}ImplicitGeometry' % ns_citygml) == []:
-                polys = m3dm.polygonFinder(child)
-                # Iterate over all the polygons of the children of cityObjectMember
-                for poly in polys:
-                    # decompose all the polygons in the interior and exterior rings
-                    exter, inter = m3dm.polydecomposer(poly)
-                    # iterate over all the exterior rings
-                    for e in exter:
-                        # find all the coordinates that are stored as a "posList"
-                        if len(e.findall('.//{%s}posList' % ns_gml)) > 0:
-                            points_tmp = e.findall('.//{%s}posList' % ns_gml)[0].text
-                            points = points_tmp.replace('\n', ' ')
-                            translated = splitAndApplyTrafo(points, transParam)
-                            # print("Before: ", e.findall('.//{%s}posList' % ns_gml)[0].text)
-                            e.findall('.//{%s}posList' % ns_gml)[0].text = translated
-                            # print("Result: ", e.findall('.//{%s}posList' % ns_gml)[0].text)
-                        # find all the coordinates that are stored as "pos"
-                        elif len(e.findall('.//{%s}pos' % ns_gml)) > 0:
-                            points = e.findall('.//{%s}pos' % ns_gml)
-                            counter = 0
-                            for k in points:
-                                translated = splitAndApplyTrafo(k.text, transParam)
-                                e.findall('.//{%s}pos' % ns_gml)[counter].text = translated
-                                counter = counter + 1
-                    # iterate over all the interior rings
-                    for i in inter:
-                        # find all the coordinates that are stored as a "posList"
-                        if len(i.findall('.//{%s}posList' % ns_gml)) > 0:
-                            points_tmp = i.findall('.//{%s}posList' % ns_gml)[0].text
-                            points = points_tmp.replace('\n', ' ')
-                            translated = splitAndApplyTrafo(points, transParam)
-                            i.findall('.//{%s}posList' % ns_gml)[0].text = translated
-                        # find all the coordinates that are stored as "pos"
-                        elif len(i.findall('.//{%s}pos' % ns_gml)) > 0:
-                            points = i.findall('.//{%s}pos' % ns_gml)
-                            counter = 0
-                            for k in points:
-                                translated = splitAndApplyTrafo(k.text, transParam)
-                                i.findall('.//{%s}pos' % ns_gml)[counter].text = translated
-                                counter = counter + 1
-
-            else:  # This condition is used in order to transform the reference points of the implicitly defined geometries
-                # Step 1: find all the reference points:
-                referencePoints = child.findall('.//{%s}referencePoint' % ns_citygml)
-                for referencePoint in referencePoints:
-                    points_tmp = referencePoint.findall('.//{%s}pos' % ns_gml)
-                    points = points_tmp.replace('\n', ' ')
-                    counter = 0
-                    for l in points:
-                        translated = splitAndApplyTrafo(l.text, transParam)
-                        referencePoint.findall('.//{%s}pos' % ns_gml)[counter].text = translated
-                        counter = counter + 1
+        translateCityObjectMember(obj, offsets, ns_citygml, ns_gml)
 
     # Iterate over all the envelopes
-    for envelope in root.getiterator('{%s}Envelope' % ns_gml):
-        lowerCorner = envelope.findall('.//{%s}lowerCorner' % ns_gml)[0].text
-        upperCorner = envelope.findall('.//{%s}upperCorner' % ns_gml)[0].text
-        translatedLowerCorner = splitAndApplyTrafo(lowerCorner, transParam)
-        translatedUpperCorner = splitAndApplyTrafo(upperCorner, transParam)
-        envelope.findall('.//{%s}lowerCorner' % ns_gml)[0].text = translatedLowerCorner
-        envelope.findall('.//{%s}upperCorner' % ns_gml)[0].text = translatedUpperCorner
+    translateEnvelopes(root, offsets, ns_gml)
 
     CITYGML.write(filename + "_local_" + ".gml")
     return root
 
 
+# This function translates the coordinates of the geometry of one cityObjectMember
+def translateCityObjectMember(obj, offsets, ns_citygml, ns_gml):
+    # Iterate over all the children of cityObject Member
+    for child in obj.getchildren():
+        # Exclude all the implicitly referenced objects from the transformation
+        if child.find('.//{%s}ImplicitGeometry' % ns_citygml) is None:
+            # Iterate over all the polygons of the children of cityObjectMember
+            for poly in child.iter('{%s}Polygon' % ns_gml):
+                # decompose all the polygons in the interior and exterior rings
+                for ring in poly.iter('{%s}exterior' % ns_gml, '{%s}interior' % ns_gml):
+                    translateRing(ring, offsets, ns_gml)
+        else:  # This condition is used in order to transform the reference points of the implicitly defined geometries
+            for referencePoint in child.iter('{%s}referencePoint' % ns_citygml):
+                for pos in referencePoint.iter('{%s}pos' % ns_gml):
+                    pos.text = translateCoordinates(pos.text, offsets)
+
+
+# This function translates the coordinates of a ring, stored either as a "posList" or as "pos" elements
+def translateRing(ring, offsets, ns_gml):
+    posList = ring.find('.//{%s}posList' % ns_gml)
+    if posList is not None:
+        posList.text = translateCoordinates(posList.text, offsets)
+    else:
+        for pos in ring.iter('{%s}pos' % ns_gml):
+            pos.text = translateCoordinates(pos.text, offsets)
+
+
+# This function translates the corners of all the envelopes in an element
+def translateEnvelopes(element, offsets, ns_gml):
+    for envelope in element.iter('{%s}Envelope' % ns_gml):
+        lowerCorner = envelope.find('.//{%s}lowerCorner' % ns_gml)
+        upperCorner = envelope.find('.//{%s}upperCorner' % ns_gml)
+        lowerCorner.text = translateCoordinates(lowerCorner.text, offsets)
+        upperCorner.text = translateCoordinates(upperCorner.text, offsets)
+
+
+# This function parses the children of the root of a CityGML file one by one (cityObjectMembers, envelopes, ...)
+# Each of them is freed after it has been used, so only one at a time has to be kept in memory
+def iterTopLevelElements(path):
+    for event, element in etree.iterparse(path, events=('end',), huge_tree=True):
+        parent = element.getparent()
+        if parent is not None and parent.getparent() is None:
+            yield element
+            # Get rid of the element and of the ones before it
+            element.clear()
+            while element.getprevious() is not None:
+                del parent[0]
+
+
+# This function is the streaming counterpart of getEnvelopes and getTranslationParameters: the envelopes
+# are read in a first pass over the file, without keeping the document in memory
+def getTranslationParametersStreaming(path, ns_gml):
+    envelopes = []
+    for element in iterTopLevelElements(path):
+        for envelope in element.iter('{%s}Envelope' % ns_gml):
+            envelopes.append(copy.deepcopy(envelope))
+    return getTranslationParameters(envelopes, ns_gml)
+
+
+# This function is the streaming counterpart of appyTranslationToCityGML: the document is parsed element by
+# element, and each of them is translated and written to the "_local_" file right away with etree.xmlfile
+# Returns the path of the written file
+def applyTranslationStreaming(path, transParam, ns_citygml, ns_gml, filename):
+    offsets = [fixedPoint(transParam[1]), fixedPoint(transParam[0]), fixedPoint(transParam[2])]
+    localPath = filename + "_local_" + ".gml"
+    with etree.xmlfile(localPath, encoding='utf-8') as xf:
+        xf.write_declaration()
+        rootElement = None
+        for element in iterTopLevelElements(path):
+            if rootElement is None:
+                # The root is opened once its first child has been parsed
+                root = element.getparent()
+                rootElement = xf.element(root.tag, dict(root.attrib), nsmap=root.nsmap)
+                rootElement.__enter__()
+                if root.text:
+                    xf.write(root.text)
+            if element.tag == '{%s}cityObjectMember' % ns_citygml:
+                translateCityObjectMember(element, offsets, ns_citygml, ns_gml)
+            translateEnvelopes(element, offsets, ns_gml)
+            xf.write(element)
+        if rootElement is not None:
+            rootElement.__exit__(None, None, None)
+    return localPath
+
+
 # This function is used in order to write the previously calculated translation parameters to a
 # designated .txt file. The use of this functionality is optional and can be activated by setting the
 # optional "write2file" parameter to "True" when calling the "translateToLocalCRS" - function.
@@ -328,12 +262,40 @@ def writeTransparam2File(filename, directory, transParam):
     print("Translation parameters written to: " + textfileName)
     return 0
 
+# The translated CityGML file is written to the "localDirectory", which defaults to the current working directory.
 def translateToLocalCRS(CITYGML, file, root, ns_bldg, ns_gml, ns_citygml, ns_frn, ns_veg, directory, write2file=False,
-                        applyHeight=Decimal("0")):
+                        applyHeight=Decimal("0"), localDirectory=""):
     envelopes = getEnvelopes(root, ns_bldg, ns_gml, ns_citygml)
     transParam = getTranslationParameters(envelopes, ns_gml)
     transParam.append(applyHeight)
     if write2file == True:
         writeTransparam2File(file, directory, transParam)
-    appyTranslationToCityGML(CITYGML, root, transParam, ns_citygml, ns_gml, ns_frn, ns_veg, file)
+    appyTranslationToCityGML(CITYGML, root, transParam, ns_citygml, ns_gml, ns_frn, ns_veg, localDirectory + file)
     return 0
+
+
+# This is the streaming counterpart of translateToLocalCRS, for documents which do not fit into memory
+# The translated CityGML file is written to the "localDirectory" as well, its path is returned
+def translateToLocalCRSStreaming(path, file, ns_gml, ns_citygml, directory, write2file=False,
+                                 applyHeight=Decimal("0"), localDirectory=""):
+    transParam = getTranslationParametersStreaming(path, ns_gml)
+    transParam.append(applyHeight)
+    if write2file == True:
+        writeTransparam2File(file, directory, transParam)
+    return applyTranslationStreaming(path, transParam, ns_citygml, ns_gml, localDirectory + file)
+
+
+# Instead of rewriting the coordinates of the document, the translation can be applied to the coordinates when
+# they are parsed for the conversion (see m3dm.GMLpointsArray). This function only determines the translation parameters
+# and returns them as a float64 offset in the order of the coordinates of a point (y, x, z)
+# The envelopes are taken from the root if the document is in memory, else they are streamed from the path
+# No CityGML file is written, only the .txt file of the parameters if "write2file" is set
+def getLocalCRSOffset(root, path, file, ns_gml, directory, write2file=False, applyHeight=Decimal("0")):
+    if root is not None:
+        transParam = getTranslationParameters(getEnvelopes(root, None, ns_gml, None), ns_gml)
+    else:
+        transParam = getTranslationParametersStreaming(path, ns_gml)
+    transParam.append(applyHeight)
+    if write2file == True:
+        writeTransparam2File(file, directory, transParam)
+    return np.array([float(transParam[1]), float(transParam[0]), float(transParam[2])], dtype=np.float64)
@@ -0,0 +1,183 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# This code is part of the CityGML2OBJs package
+
+# Copyright (c) 2014
+# Filip Biljecki
+# Delft University of Technology
+# fbiljecki@gmail.com
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+# -- Scaling benchmark of the converter: synthetic CityGML files of growing size (see generateCityGML) are converted
+# -- by CityGML2OBJs.py under the main combinations of its options, each in a fresh process as from the command line.
+# -- Reports the time, the buildings per second and the polygons per second of each run, as one scaling curve per
+# -- combination, and optionally writes them to a CSV file and plots them.
+# -- Usage: python benchmarkscaling.py [-n 10,100,1000,10000,100000] [-v 2] [-l 3] [-x "-str 1"] [-csv results.csv]
+# --                                  [-plot curves.png]
+
+import argparse
+import csv
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import generateCityGML
+
+# -- Combinations of options which are timed, by their label
+combinations = [
+    ('plain', []),
+    ('-s', ['-s', '1']),
+    ('-v', ['-v', '1']),
+    ('-p', ['-p', '1']),
+    ('-tC', ['-tC', '1']),
+    ('-sepC', ['-sepC', '1']),
+]
+
+# -- Sizes (number of buildings) of the files
+defaultSizes = [10, 100, 1000, 10000, 100000]
+
+
+def run(directory, options, timeout):
+    """Converts the CityGML file of the directory with the given options in a fresh process, returns the wall time
+    (None if the conversion failed or timed out)."""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'CityGML2OBJs.py')
+    result = tempfile.mkdtemp(prefix='results_', dir=directory)
+    start = time.perf_counter()
+    try:
+        subprocess.run([sys.executable, script, '-i', directory, '-o', result] + options, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout)
+        elapsed = time.perf_counter() - start
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        elapsed = None
+    finally:
+        shutil.rmtree(result, ignore_errors=True)
+        # -- Files written next to the input with -tC/-tCw
+        for f in os.listdir(directory):
+            if '_local_' in f or f.endswith('_Translation_Parameters.txt'):
+                os.remove(os.path.join(directory, f))
+    return elapsed
+
+
+def plot(rows, path):
+    """Plots buildings/s and polygons/s against the number of buildings, one curve per combination."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    fig, axes = plt.subplots(1, 2, figsize=(12, 4.5))
+    for label, options in combinations:
+        points = [r for r in rows if r['options'] == label and r['seconds'] is not None]
+        if points:
+            axes[0].plot([r['buildings'] for r in points], [r['buildings/s'] for r in points], marker='o', label=label)
+            axes[1].plot([r['buildings'] for r in points], [r['polygons/s'] for r in points], marker='o', label=label)
+    for ax, name in zip(axes, ['buildings/s', 'polygons/s']):
+        ax.set_xscale('log')
+        ax.set_xlabel('buildings in the file')
+        ax.set_ylabel(name)
+        ax.grid(True, which='both', alpha=0.3)
+    axes[0].legend()
+    fig.tight_layout()
+    fig.savefig(path, dpi=150)
+
+
+if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser(description='Benchmark the scaling of CityGML2OBJs on synthetic CityGML files.')
+    PARSER.add_argument('-n', '--sizes',
+                        help='Comma separated numbers of buildings. 10,100,1000,10000,100000 is default.',
+                        required=False)
+    PARSER.add_argument('-v', '--version', help='Version of CityGML of the files: 1, 2 or 3. 2 is default.',
+                        required=False)
+    PARSER.add_argument('-l', '--lod', help='Level of detail of the files: 2 or 3. 3 is default.', required=False)
+    PARSER.add_argument('-c', '--combinations',
+                        help='Comma separated labels of the combinations to run (plain,-s,-v,-p,-tC,-sepC). All is default.',
+                        required=False)
+    PARSER.add_argument('-maxSepC', '--maxSeparation',
+                        help='Largest file (in buildings) converted with -sepC, which writes one file per component. 1000 is default.',
+                        required=False)
+    PARSER.add_argument('-t', '--timeout', help='Time limit of one conversion in seconds. No limit is default.',
+                        required=False)
+    PARSER.add_argument('-x', '--extra',
+                        help='Options added to every combination, e.g. "-str 1 -w 4". None is default.',
+                        required=False)
+    PARSER.add_argument('-csv', '--csv', help='Write the results to this CSV file.', required=False)
+    PARSER.add_argument('-plot', '--plot', help='Plot the scaling curves to this image (needs Matplotlib).',
+                        required=False)
+    PARSER.add_argument('-d', '--directory',
+                        help='Directory for the generated files, which are kept. A temporary directory is default.',
+                        required=False)
+    ARGS = vars(PARSER.parse_args())
+    SIZES = [int(n) for n in ARGS['sizes'].split(',')] if ARGS['sizes'] else defaultSizes
+    VERSION = int(ARGS['version']) if ARGS['version'] in ('1', '2', '3') else 2
+    LOD = 2 if ARGS['lod'] == '2' else 3
+    LABELS = ARGS['combinations'].split(',') if ARGS['combinations'] else [label for label, options in combinations]
+    MAXSEPARATION = int(ARGS['maxSeparation']) if ARGS['maxSeparation'] is not None else 1000
+    TIMEOUT = float(ARGS['timeout']) if ARGS['timeout'] is not None else None
+    EXTRA = ARGS['extra'].split() if ARGS['extra'] else []
+
+    workdir = ARGS['directory'] or tempfile.mkdtemp(prefix='citygml2objs_benchmark_')
+    rows = []
+    print("%-8s %10s %10s %10s %14s %14s" % ('options', 'buildings', 'polygons', 'seconds', 'buildings/s', 'polygons/s'))
+    try:
+        for size in SIZES:
+            # -- One directory per size, as the converter converts all the files of its input directory
+            directory = os.path.join(workdir, 'v%d_lod%d_%d' % (VERSION, LOD, size))
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            stats = generateCityGML.generate(os.path.join(directory, 'synthetic.gml'), size, VERSION, LOD)
+            for label, options in combinations:
+                if label not in LABELS or (label == '-sepC' and size > MAXSEPARATION):
+                    continue
+                seconds = run(directory, options + EXTRA, TIMEOUT)
+                row = {'options': label, 'version': VERSION, 'lod': LOD, 'buildings': size,
+                       'polygons': stats['polygons'], 'seconds': seconds,
+                       'buildings/s': size / seconds if seconds else None,
+                       'polygons/s': stats['polygons'] / seconds if seconds else None}
+                rows.append(row)
+                if seconds is None:
+                    print("%-8s %10d %10d %10s" % (label, size, stats['polygons'], 'failed'))
+                else:
+                    print("%-8s %10d %10d %10.2f %14.1f %14.1f" % (label, size, stats['polygons'], seconds,
+                                                                    row['buildings/s'], row['polygons/s']))
+                sys.stdout.flush()
+    finally:
+        if ARGS['directory'] is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    # -- Scaling curves: the throughput of each combination by size
+    print("\nScaling (buildings/s by number of buildings)")
+    for label in LABELS:
+        points = [r for r in rows if r['options'] == label and r['seconds'] is not None]
+        if points:
+            print("%-8s %s" % (label, "  ".join("%d: %.1f" % (r['buildings'], r['buildings/s']) for r in points)))
+
+    if ARGS['csv']:
+        with open(ARGS['csv'], 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else ['options'])
+            writer.writeheader()
+            writer.writerows(rows)
+        print("Results written to: " + ARGS['csv'])
+    if ARGS['plot']:
+        plot(rows, ARGS['plot'])
+        print("Curves plotted to: " + ARGS['plot'])
@@ -0,0 +1,102 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# This code is part of the CityGML2OBJs package
+
+# Copyright (c) 2014
+# Filip Biljecki
+# Delft University of Technology
+# fbiljecki@gmail.com
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+# -- Benchmark of the startup of the converter: the modules of CityGML2OBJs are imported in fresh interpreters,
+# -- as when converting many small tiles one by one. Reports the time and the memory it takes, and fails if one
+# -- of the heavy dependencies, which are only needed by some options, is loaded at startup.
+# -- Usage: python benchmarkstartup.py [-n 10] [-m 1.5]
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+# -- Dependencies that are only imported by the code paths needing them (-sepC, -appW, -a, point_inside)
+heavyModules = ['matplotlib', 'open3d', 'sklearn', 'shapely', 'scipy']
+
+# -- What is imported by the command line tool before any file is touched
+startupCode = """
+import sys, json
+import CityGML2OBJs
+import conversionmodule
+print(json.dumps([m for m in %r if m in sys.modules]))
+""" % heavyModules
+
+
+def startup(directory):
+    """Imports the converter in a fresh interpreter. Returns the wall time and the heavy modules that were loaded."""
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', startupCode], cwd=directory, check=True,
+                            stdout=subprocess.PIPE, universal_newlines=True).stdout
+    return time.perf_counter() - start, json.loads(output.splitlines()[-1])
+
+
+if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser(description='Benchmark the startup of CityGML2OBJs.')
+    PARSER.add_argument('-n', '--runs', help='Number of interpreters started. 10 is default.', required=False)
+    PARSER.add_argument('-m', '--maximum',
+                        help='Fail if the median startup time exceeds this number of seconds. No limit is default.',
+                        required=False)
+    ARGS = vars(PARSER.parse_args())
+    RUNS = max(int(ARGS['runs']), 1) if ARGS['runs'] is not None else 10
+    MAXIMUM = float(ARGS['maximum']) if ARGS['maximum'] is not None else None
+
+    directory = os.path.dirname(os.path.abspath(__file__))
+    # -- The interpreter alone, as the baseline
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], check=True)
+    interpreter = time.perf_counter() - start
+
+    times = []
+    loaded = []
+    for run in range(RUNS):
+        t, loaded = startup(directory)
+        times.append(t)
+    # -- Largest resident set size of the started interpreters (kilobytes on Linux)
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024.0
+
+    print("Startup of CityGML2OBJs (%d runs)" % RUNS)
+    print("\tinterpreter alone: %.3f s" % interpreter)
+    print("\tmedian: %.3f s, min: %.3f s, max: %.3f s" % (statistics.median(times), min(times), max(times)))
+    print("\tpeak RSS: %.1f MB" % rss)
+    print("\theavy modules loaded: %s" % (", ".join(loaded) if loaded else "none"))
+
+    failed = False
+    if loaded:
+        print("FAIL: heavy modules are imported at startup.")
+        failed = True
+    if MAXIMUM is not None and statistics.median(times) > MAXIMUM:
+        print("FAIL: the median startup time exceeds %.3f s." % MAXIMUM)
+        failed = True
+    sys.exit(1 if failed else 0)
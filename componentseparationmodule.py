@@ -1,11 +1,8 @@
 import re
-import config
 import markup3dmodule as m3dm
 import polygon3dmodule as p3dm
 import json
 import numpy as np
-import open3d as o3d
-import open3d.core as o3c
 import os
 
 
@@ -60,45 +57,32 @@ def addTranslationParameters(e, i, trans_param):
     else:
         return e.tolist(), i
 
-def getBufferedBBoxPoints(b):
+# -- All the components of a building share its buffered bounding box, so separateComponents computes it once and
+# -- passes it to writeBBOXJSON and claculateCornerTriangles
+def getBufferedBBoxPoints(b, ns, offset=None):
     # Schritt 1: identifying all wallsurfaces and roof surfaces of the building
     output = {}
-    specifyVersion()
     # comprehensive list of semantic surfaces
     semanticSurfaces = ['GroundSurface', 'WallSurface', 'RoofSurface', 'ClosureSurface', 'CeilingSurface', ]
 
     for semanticSurface in semanticSurfaces:
         output[semanticSurface] = []
     data = []
+    # -- Bucket the semantic surfaces in one walk of the building
+    buckets = m3dm.classifyBuilding(b, ns, semanticSurfaces)
     for cl in output:
-        cls = []
-        for child in b.getiterator():
-            if child.tag == '{%s}%s' % (ns_bldg, cl):
-                cls.append(child)
-
-        for feature in cls:
-            for p in feature.findall('.//{%s}Polygon' % ns_gml):
-                e, i = m3dm.polydecomposer(p)
-                epoints = m3dm.GMLpoints(e[0])
-                # -- Clean recurring points, except the last one
-                last_ep = epoints[-1]
-                epoints_clean = list(remove_reccuring(epoints))
-                epoints_clean.append(last_ep)
-                for point in epoints_clean:
-                    data.append(point)
+        for feature, polys in buckets[cl]:
+            for p in polys:
+                e, i = m3dm.polydecomposer(p, ns)
+                # -- Recurring points do not change the bounding box, so the parsed ring is used as it is
+                data.append(m3dm.GMLpointsArray(e[0], ns, offset))
 
     # Schritt 2: Idetify the Bounding volume
-    # 2.1 creating an open3d pointcloud from all the idetified vertex points
-    pcd = o3d.t.geometry.PointCloud(o3c.Tensor(data, o3c.float32))
-    # 2.2 obtain the axis aligned boundign box of the point cloud
-    axis_aligned_bb = pcd.get_axis_aligned_bounding_box()
+    # -- The axis aligned bounding box is the minimum and the maximum of the vertices (in double precision)
+    points = np.vstack(data)
+    min_x, min_y, min_z = np.min(points, axis=0)
+    max_x, max_y, max_z = np.max(points, axis=0)
     # Schritt 3: Construct small triangles that describe the boundign box sufficienly
-    box_points = axis_aligned_bb.get_box_points().numpy().tolist()
-    # Convert the list to a numpy array for easier manipulation
-    box_points = np.array(box_points)
-    # Calculate the min and max coordinates
-    min_x, min_y, min_z = np.min(box_points, axis=0)
-    max_x, max_y, max_z = np.max(box_points, axis=0)
     # Add a 3m buffer
     buffer = 3
     min_x -= buffer
@@ -120,11 +104,10 @@ def getBufferedBBoxPoints(b):
     ])
     return buffered_box_points
 
-def obtainSRSInfo(root):
-    specifyVersion()
+def obtainSRSInfo(root, ns):
     # obtain the envelope object
     envelopes = []
-    for envelope in root.getiterator('{%s}Envelope' % ns_gml):
+    for envelope in root.getiterator(ns.tag('gml', 'Envelope')):
         envelopes.append(envelope)
 
     # Extracting the srsName attribute from each Envelope
@@ -134,7 +117,7 @@ def obtainSRSInfo(root):
 
 
 # This function is used to create a corresponding json file defining the bbox of an object for each corresponding obj file
-def writeBBOXJSON(b, overall_counter, path, b_counter, trans_param):
+def writeBBOXJSON(buffered_box_points_global, overall_counter, path, b_counter, trans_param):
     if len(trans_param) > 0:
         translation_parameters = {
             "d_x": str(trans_param[0]),
@@ -148,8 +131,6 @@ def writeBBOXJSON(b, overall_counter, path, b_counter, trans_param):
             "d_z": str(0)
         }
 
-    buffered_box_points_global = getBufferedBBoxPoints(b)
-
     # translate to the local coordinate system
     buffered_box_points, _ = addTranslationParameters(buffered_box_points_global, [], trans_param=trans_param)
 
@@ -185,12 +166,37 @@ def writeBBOXJSON(b, overall_counter, path, b_counter, trans_param):
     return 0
 
 
+class IndexFiles:
+    """Content of the index files (index.json) of the components, keyed by their path. It is kept in memory and
+    written once, instead of loading and dumping the whole file again for every component.
+    Each conversion has its own (see conversionmodule.FileConversion) and passes it down to the functions here."""
+
+    def __init__(self):
+        self.files = {}
+
+    def get(self, json_file_path):
+        """Content of an index file, read from the disk the first time if the file exists already."""
+        if json_file_path not in self.files:
+            if os.path.exists(json_file_path):
+                with open(json_file_path, 'r') as json_file:
+                    self.files[json_file_path] = json.load(json_file)
+            else:
+                self.files[json_file_path] = {}
+        return self.files[json_file_path]
+
+    def write(self):
+        """Writes the index files kept in memory and forgets their content."""
+        for json_file_path, content in self.files.items():
+            with open(json_file_path, 'w') as json_file:
+                json.dump(content, json_file, indent=4)
+        self.files.clear()
+
+
 # This function is used to add information about the used spatial reference system to the json file
-def addCRSToJSON(root, json_file_path):
-    specifyVersion()
+def addCRSToJSON(root, json_file_path, ns, index):
     # obtain the envelope object
     envelopes = []
-    for envelope in root.getiterator('{%s}Envelope' % ns_gml):
+    for envelope in root.getiterator(ns.tag('gml', 'Envelope')):
         envelopes.append(envelope)
     if envelopes:
         # Extracting the srsName attribute from each Envelope
@@ -202,12 +208,8 @@ def addCRSToJSON(root, json_file_path):
 
 
     used_srs = srs_names[0]
-    # Prüfen, ob die JSON-Datei existiert und laden
-    if os.path.exists(json_file_path):
-        with open(json_file_path, 'r') as json_file:
-            crs_info = json.load(json_file)
-    else:
-        crs_info = {}
+    # The index is written at the end, see IndexFiles
+    crs_info = index.get(json_file_path)
 
     # Neuen Identifier hinzufügen
     crs_info["CRS"] = {
@@ -215,16 +217,10 @@ def addCRSToJSON(root, json_file_path):
         "srsDimensions": srs_Dimensions
     }
 
-    # Zuordnungen in JSON-Datei schreiben
-    with open(json_file_path, 'w') as json_file:
-        json.dump(crs_info, json_file, indent=4)
-
     return 0
 
 
-def claculateCornerTriangles(b, trans_param):
-    buffered_box_points = getBufferedBBoxPoints(b)
-
+def claculateCornerTriangles(buffered_box_points, trans_param):
     # Translate the Bounding box into the local coordinate system
     # buffered_box_points, _ = addTranslationParameters(buffered_box_points_global, [], trans_param=trans_param)
 
@@ -242,7 +238,7 @@ def claculateCornerTriangles(b, trans_param):
 
 
 # diese funktion dient dazu ein JSON file zu schreiben um die meta informationen über die einzelnen objekte zuspeichern
-def add_identifier_to_json(filename, tag, parentID, gmlID, json_file_path):
+def add_identifier_to_json(filename, tag, parentID, gmlID, json_file_path, index):
     """
     Adds the identifier information for one .obj file to a JSON file.
 
@@ -252,14 +248,11 @@ def add_identifier_to_json(filename, tag, parentID, gmlID, json_file_path):
     - parentID (str): The parent ID corresponding to the .obj file.
     - gmlID (str): The gml ID corresponding to the .obj file.
     - json_file_path (str): Path to the JSON file where identifier information will be stored.
+    - index (IndexFiles): The index files of the conversion, in which the JSON file is kept until it is written.
     """
 
-    # Prüfen, ob die JSON-Datei existiert und laden
-    if os.path.exists(json_file_path):
-        with open(json_file_path, 'r') as json_file:
-            identifiers = json.load(json_file)
-    else:
-        identifiers = {}
+    # The index is kept in memory and written at the end, see IndexFiles
+    identifiers = index.get(json_file_path)
 
     # Neuen Identifier hinzufügen
     identifiers[filename] = {
@@ -268,31 +261,10 @@ def add_identifier_to_json(filename, tag, parentID, gmlID, json_file_path):
         'gmlID': gmlID
     }
 
-    # Zuordnungen in JSON-Datei schreiben
-    with open(json_file_path, 'w') as json_file:
-        json.dump(identifiers, json_file, indent=4)
-
     print(f"Zuordnung für {filename} wurde gespeichert.")
 
 
-def perturb_points(points, perturbation_scale=1e-6):
-    """
-    Perturb the points slightly to avoid degenerate cases.
-
-    Parameters:
-        points (list of tuple of floats): A list where each element is a tuple (x, y, z) representing a 3D point.
-        perturbation_scale (float): The maximum magnitude of the perturbation applied to each coordinate.
-
-    Returns:
-        list of list of floats: Perturbed list of points.
-    """
-    points_array = np.array(points)
-    perturbation = np.random.uniform(-perturbation_scale, perturbation_scale, points_array.shape)
-    perturbed_points = points_array + perturbation
-    return perturbed_points.tolist()
-
-
-def write_obj_file(surfaces, filename, tag, parentid, gmlid, counter, path, tr_1, translation_parameters):
+def write_obj_file(surfaces, filename, tag, parentid, gmlid, counter, path, tr_1, translation_parameters, index):
     for triangle in tr_1:
         triangle_local, _ = addTranslationParameters(triangle, [], trans_param=translation_parameters)
         surfaces.append(triangle_local)
@@ -303,7 +275,7 @@ def write_obj_file(surfaces, filename, tag, parentid, gmlid, counter, path, tr_1
                 file.write(f"v {vertex[0]} {vertex[1]} {vertex[2]}\n")
             file.write(f"f {vertex_index} {vertex_index + 1} {vertex_index + 2}\n")
             vertex_index += 3
-    add_identifier_to_json(filename, tag, parentid, gmlid, (path + "index.json"))
+    add_identifier_to_json(filename, tag, parentid, gmlid, (path + "index.json"), index)
 
 
 def remove_reccuring(list_vertices):
@@ -313,9 +285,19 @@ def remove_reccuring(list_vertices):
     list_vertices_without_last = list_vertices[:-1]
     found = set()
     for item in list_vertices_without_last:
-        if str(item) not in found:
+        if tuple(item) not in found:
             yield item
-            found.add(str(item))
+            found.add(tuple(item))
+
+
+def clean_ring(points):
+    """Converts the points of a ring parsed by m3dm.GMLpointsArray to a list,
+    without the recurring points except the last one."""
+    listPoints = points.tolist()
+    last_point = listPoints[-1]
+    listPoints_clean = list(remove_reccuring(listPoints))
+    listPoints_clean.append(last_point)
+    return listPoints_clean
 
 
 def separate_string(s):
@@ -332,122 +314,106 @@ def separate_string(s):
         return None, None
 
 
-def specifyVersion():
-    global ns_citygml
-    global ns_gml
-    global ns_bldg
-    global ns_xsi
-    global ns_xAL
-    global ns_xlink
-    global ns_dem
-    global ns_con
-    global ns_app
-    global ns_pcl
-    global ns_gen
-    global ns_gss
-    global ns_pfx0
-    global ns_gsr
-    global ns_tran
-    global ns_gmd
-    global ns_gts
-    global ns_veg
-    global ns_frn
-    global ns_tun
-    global ns_wtr
-    global nsmap
-
-    if config.getVersion() == 1:
-        # -- Name spaces for CityGML 2.0
-        ns_citygml = "http://www.opengis.net/citygml/1.0"
-        ns_gml = "http://www.opengis.net/gml"
-        ns_bldg = "http://www.opengis.net/citygml/building/1.0"
-        ns_tran = "http://www.opengis.net/citygml/transportation/1.0"
-        ns_veg = "http://www.opengis.net/citygml/vegetation/1.0"
-        ns_gen = "http://www.opengis.net/citygml/generics/1.0"
-        ns_xsi = "http://www.w3.org/2001/XMLSchema-instance"
-        ns_xAL = "urn:oasis:names:tc:ciq:xsdschema:xAL:1.0"
-        ns_xlink = "http://www.w3.org/1999/xlink"
-        ns_dem = "http://www.opengis.net/citygml/relief/1.0"
-        ns_frn = "http://www.opengis.net/citygml/cityfurniture/1.0"
-        ns_tun = "http://www.opengis.net/citygml/tunnel/1.0"
-        ns_wtr = "http://www.opengis.net/citygml/waterbody/1.0"
-        ns_brid = "http://www.opengis.net/citygml/bridge/1.0"
-        ns_app = "http://www.opengis.net/citygml/appearance/1.0"
-    if config.getVersion() == 2:
-        # -- Name spaces for CityGML 2.0
-        ns_citygml = "http://www.opengis.net/citygml/2.0"
-        ns_gml = "http://www.opengis.net/gml"
-        ns_bldg = "http://www.opengis.net/citygml/building/2.0"
-        ns_xsi = "http://www.w3.org/2001/XMLSchema-instance"
-        ns_xAL = "urn:oasis:names:tc:ciq:xsdschema:xAL:2.0"
-        ns_xlink = "http://www.w3.org/1999/xlink"
-        ns_dem = "http://www.opengis.net/citygml/relief/2.0"
-    elif config.getVersion() == 3:
-        # -- Name spaces for CityGML 3.0
-        ns_citygml = "http://www.opengis.net/citygml/3.0"
-        ns_con = "http://www.opengis.net/citygml/construction/3.0"
-        ns_xlink = "http://www.w3.org/1999/xlink"
-        ns_gml = "http://www.opengis.net/gml/3.2"
-        ns_bldg = "http://www.opengis.net/citygml/building/3.0"
-        ns_app = "http://www.opengis.net/citygml/appearance/3.0"
-        ns_pcl = "http://www.opengis.net/citygml/pointcloud/3.0"
-        ns_gen = "http://www.opengis.net/citygml/generics/3.0"
-        ns_gss = "http://www.isotc211.org/2005/gss"
-        ns_pfx0 = "urn:oasis:names:tc:ciq:xsdschema:xAL:2.0"
-        ns_gsr = "http://www.isotc211.org/2005/gsr"
-        ns_xsi = "http://www.w3.org/2001/XMLSchema-instance"
-        ns_tran = "http://www.opengis.net/citygml/transportation/3.0"
-        ns_gmd = "http://www.isotc211.org/2005/gmd"
-        ns_gts = "http://www.isotc211.org/2005/gts"
-        ns_veg = "http://www.opengis.net/citygml/vegetation/3.0"
-        ns_xAL = "urn:oasis:names:tc:ciq:xal:3"
-        ns_dem = "http://www.opengis.net/citygml/relief/3.0"
-        ns_frn = "http://www.opengis.net/citygml/cityfurniture/3.0"
-        ns_tun = "http://www.opengis.net/citygml/tunnel/3.0"
-        ns_wtr = "http://www.opengis.net/citygml/waterbody/3.0"
-
-    nsmap = {
-        None: ns_citygml,
-        'gml': ns_gml,
-        'bldg': ns_bldg,
-        'xsi': ns_xsi,
-        'xAL': ns_xAL,
-        'xlink': ns_xlink,
-        'dem': ns_dem
-    }
+# -- Thickness (in the units of the coordinates) up to which the points of an opening are taken as planar
+planarTolerance = 1e-3
 
 
-def compute_convex_hull(points):
+def convexHull2D(points):
     """
-    Computes the convex hull of a set of 3D points using Open3D, including triangulation of the hull's faces.
+    Computes the convex hull of 2D points with Andrew's monotone chain.
 
     Parameters:
-        points (list of tuple of floats): A list where each element is a tuple (x, y, z) representing a 3D point.
+        points (numpy array): (N, 2) array of the points.
 
     Returns:
-        list: A list of faces, where each face is a list of vertex coordinates forming that face.
+        list: Indices of the vertices of the hull in counter-clockwise order (fewer than 3 if the points are collinear).
+    """
+    order = np.lexsort((points[:, 1], points[:, 0])).tolist()
+    xy = points.tolist()
+
+    def chain(indices):
+        hull = []
+        for k in indices:
+            while len(hull) >= 2:
+                (ax, ay), (bx, by), (cx, cy) = xy[hull[-2]], xy[hull[-1]], xy[k]
+                if (bx - ax) * (cy - ay) - (by - ay) * (cx - ax) > 0:
+                    break
+                hull.pop()
+            hull.append(k)
+        return hull
+
+    lower = chain(order)
+    upper = chain(order[::-1])
+    return lower[:-1] + upper[:-1]
+
+
+def compute_convex_hulls(pointSets):
+    """
+    Approximates each set of 3D points (the exterior points of an opening) by its convex hull.
+    The planes of all the sets are fitted at once (principal axes of their covariances). The hull of a set which is
+    thicker than the planar tolerance along its normal is the 3D convex hull of its points, computed with Qhull
+    (scipy.spatial.ConvexHull). A planar opening has no 3D hull, it gives both sides of its 2D hull in its plane.
+
+    Parameters:
+        pointSets (list of numpy arrays): (N, 3) arrays of the points of each opening.
+
+    Returns:
+        list: For each set, a list of faces, where each face is a list of the 3 vertex coordinates of a triangle.
+        The triangles of a 3D hull are oriented outwards, their vertices are points of the set.
     """
-    # Convert the list of points to a NumPy array
-    points_array = np.array(points)
-    perturbed_points = perturb_points(points_array)
+    # -- SciPy is only loaded when it is needed
+    from scipy.spatial import ConvexHull, QhullError
+    hulls = [[] for points in pointSets]
+    valid = [k for k, points in enumerate(pointSets) if len(points) >= 3]
+    if not valid:
+        return hulls
+    centroids = np.array([pointSets[k].mean(axis=0) for k in valid])
+    centred = [pointSets[k] - centroid for k, centroid in zip(valid, centroids)]
+    covariances = np.array([np.dot(points.T, points) for points in centred])
+    # -- The eigenvectors of the smallest and largest eigenvalues are the normal and the first axis of the plane
+    _, axes = np.linalg.eigh(covariances)
+    for k, points, frame in zip(valid, centred, axes):
+        n = frame[:, 0]
+        thickness = np.dot(points, n)
+        if thickness.max() - thickness.min() > planarTolerance:
+            try:
+                # -- The centred points keep Qhull away from the large coordinates of the reference system
+                hull = ConvexHull(points)
+            except QhullError:
+                continue
+            simplices = hull.simplices
+            a, b, c = points[simplices[:, 0]], points[simplices[:, 1]], points[simplices[:, 2]]
+            # -- Qhull does not orient the triangles, they are turned to the outward normals of their facets
+            inward = np.einsum('ij,ij->i', np.cross(b - a, c - a), hull.equations[:, :3]) < 0
+            simplices[inward] = simplices[inward][:, ::-1]
+            hulls[k] = pointSets[k][simplices].tolist()
+            continue
+        u = frame[:, 2]
+        v = np.cross(n, u)
+        ring = convexHull2D(np.column_stack((np.dot(points, u), np.dot(points, v))))
+        if len(ring) < 3:
+            continue
+        # -- The vertices of the hull of a planar opening are points of the opening
+        side = pointSets[k][ring].tolist()
+        faces = []
+        for j in range(1, len(ring) - 1):
+            faces.append([side[0], side[j], side[j + 1]])
+            faces.append([side[0], side[j + 1], side[j]])
+        hulls[k] = faces
+    return hulls
 
-    # Create an Open3D PointCloud object
-    pcd = o3d.geometry.PointCloud()
-    pcd.points = o3d.utility.Vector3dVector(perturbed_points)
 
-    # Compute the convex hull
-    hull, triangles = pcd.compute_convex_hull()
+def compute_convex_hull(points):
+    """
+    Computes the convex hull of a set of 3D points, including triangulation of the hull's faces (see compute_convex_hulls).
 
-    # Extract vertices and faces (triangles)
-    hull_vertices = np.asarray(hull.vertices)
-    hull_triangles = np.asarray(hull.triangles)
+    Parameters:
+        points (list of tuple of floats): A list where each element is a tuple (x, y, z) representing a 3D point.
 
-    # Prepare the faces in the desired format
-    faces = []
-    for triangle in hull_triangles:
-        face = [list(hull_vertices[vertex]) for vertex in triangle]
-        faces.append(face)
-    return faces
+    Returns:
+        list: A list of faces, where each face is a list of vertex coordinates forming that face.
+    """
+    return compute_convex_hulls([np.asarray(points, dtype=np.float64).reshape(-1, 3)])[0]
 
 
 def process_polygon(p, trans_param):
@@ -459,25 +425,18 @@ def process_polygon(p, trans_param):
     return t
 
 
-def process_polygons_parallel(polys, trans_param):
+def process_polygons_parallel(polys, trans_param, ns, offset=None):
     data = []
     results = []
     for poly in polys:
-        e, i = m3dm.polydecomposer(poly)
-        epoints = m3dm.GMLpoints(e[0])
+        e, i = m3dm.polydecomposer(poly, ns)
         # -- Clean recurring points, except the last one
-        last_ep = epoints[-1]
-        epoints_clean = list(remove_reccuring(epoints))
-        epoints_clean.append(last_ep)
+        epoints_clean = clean_ring(m3dm.GMLpointsArray(e[0], ns, offset))
         # -- LinearRing(s) forming the interior
         irings = []
         for iring in i:
-            ipoints = m3dm.GMLpoints(iring)
             # -- Clean them in the same manner as the exterior ring
-            last_ip = ipoints[-1]
-            ipoints_clean = list(remove_reccuring(ipoints))
-            ipoints_clean.append(last_ip)
-            irings.append(ipoints_clean)
+            irings.append(clean_ring(m3dm.GMLpointsArray(iring, ns, offset)))
         if len(epoints_clean) > 4:
             t = process_polygon([epoints_clean, irings], trans_param=trans_param)
             results.append(t)
@@ -502,46 +461,45 @@ def process_polygons_parallel(polys, trans_param):
 
 
 # this is an experimental method for parallelization
-def processOpening(o, path, buildingid, overall_counter, tr_1, trans_param, b_counter):
+def processOpening(o, path, buildingid, overall_counter, tr_1, trans_param, b_counter, ns, index, offset=None):
     for child in o.getiterator():
-        unique_identifier = child.xpath("@g:id", namespaces={'g': ns_gml})
-        if child.tag == '{%s}Window' % ns_bldg or child.tag == '{%s}Door' % ns_bldg:
-            polys = m3dm.polygonFinder(o)
-            t = process_polygons_parallel(polys, trans_param=trans_param)
+        unique_identifier = ns.gmlId(child)
+        if child.tag in ns.openingTags:
+            polys = m3dm.polygonFinder(o, ns)
+            t = process_polygons_parallel(polys, trans_param=trans_param, ns=ns, offset=offset)
             triangles = []
             for poly in t:
                 for tr in poly:
                     triangles.append(tr)
             filename = path + str(b_counter) + "_" + str(overall_counter) + ".obj"
             write_obj_file(triangles, filename, str(child.tag), buildingid, unique_identifier, overall_counter, path,
-                           tr_1, trans_param)
+                           tr_1, trans_param, index)
 
 
-def getAllExteriorPoints(polys):
-    data = []
+def getAllExteriorPoints(polys, ns, offset=None):
+    data = [np.empty((0, 3))]
     for poly in polys:
-        e, i = m3dm.polydecomposer(poly)
-        epoints = m3dm.GMLpoints(e[0])
-        # -- Clean recurring points, except the last one
-        last_ep = epoints[-1]
-        epoints_clean = list(remove_reccuring(epoints))
-        epoints_clean.append(last_ep)
-        for point in epoints_clean:
-            data.append(point)
-    return data
+        e, i = m3dm.polydecomposer(poly, ns)
+        # -- Recurring points do not change the convex hull, so the parsed ring is used as it is
+        data.append(m3dm.GMLpointsArray(e[0], ns, offset))
+    return np.vstack(data)
 
 
-def processWithApproximatedWindows(o, path, buildingid, overall_counter, tr_1, translation_parameters, b_counter):
+def processWithApproximatedWindows(o, path, buildingid, overall_counter, tr_1, translation_parameters, b_counter,
+                                   ns, index, hull=None, offset=None):
+    # -- The hull of the opening can be computed beforehand along with the ones of the other openings
     for child in o.getiterator():
-        unique_identifier = child.xpath("@g:id", namespaces={'g': ns_gml})
-        if child.tag == '{%s}Window' % ns_bldg or child.tag == '{%s}Door' % ns_bldg:
-            polys = m3dm.polygonFinder(o)
-            exterior_points = getAllExteriorPoints(polys)
-            t_global = compute_convex_hull(exterior_points)
+        unique_identifier = ns.gmlId(child)
+        if child.tag in ns.openingTags:
+            if hull is None:
+                polys = m3dm.polygonFinder(o, ns)
+                exterior_points = getAllExteriorPoints(polys, ns, offset)
+                hull = compute_convex_hull(exterior_points)
+            t_global = hull
             _, t = addTranslationParameters(e=[], i=t_global, trans_param=translation_parameters)
             filename = path + str(b_counter) + "_" + str(overall_counter) + ".obj"
             write_obj_file(t, filename, str(child.tag), buildingid, unique_identifier, overall_counter, path, tr_1,
-                           translation_parameters=translation_parameters)
+                           translation_parameters=translation_parameters, index=index)
 
 
 # This function is used to im port a bounding box that is associated to the corresponding building component
@@ -594,11 +552,13 @@ def importBoundingBox(pathToBoundingBoxFile, trans_param):
 
 
 def separateComponents(b, path, APPROXIMATEWINDOWS, ADDBOUNDINGBOX, ADDBOUNDINGBOXJSON, TRANSLATEBUILDINGS,
-                       IMPORTBOUNDINGBOX, b_counter):
+                       IMPORTBOUNDINGBOX, b_counter, ns, index, offset=None):
+    # -- ns are the name spaces of the file and index its IndexFiles, both belong to the conversion calling this
+    # -- offset is added to all the parsed coordinates (translation into a local CRS with -tCo)
+    # Step 1: Obtain the axis oriented bounding box of the building, shared by all its components
+    if TRANSLATEBUILDINGS or ADDBOUNDINGBOX or ADDBOUNDINGBOXJSON:
+        bounding_box_points = getBufferedBBoxPoints(b, ns, offset)
     if TRANSLATEBUILDINGS:
-        # Step 1: Obtain the axis oriented bounding box of the building
-        bounding_box_points = getBufferedBBoxPoints(b)
-
         # Step 2 calculate the mean value of the points that the bbox points
         translation_parameters = np.mean(bounding_box_points, axis=0)
 
@@ -610,13 +570,11 @@ def separateComponents(b, path, APPROXIMATEWINDOWS, ADDBOUNDINGBOX, ADDBOUNDINGB
 
     # Option to include the small triangles to mark the buffered bounding box
     if ADDBOUNDINGBOX:
-        tr_1 = claculateCornerTriangles(b, trans_param=translation_parameters)
+        tr_1 = claculateCornerTriangles(bounding_box_points, trans_param=translation_parameters)
     elif not ADDBOUNDINGBOX:
         tr_1 = []
-    global overall_counter
     overall_counter = 0
     output = {}
-    specifyVersion()
     # comprehensive list of semantic surfaces
     semanticSurfaces = ['GroundSurface', 'WallSurface', 'RoofSurface', 'ClosureSurface', 'CeilingSurface',
                         'InteriorWallSurface', 'FloorSurface', 'OuterCeilingSurface', 'OuterFloorSurface', 'Door',
@@ -627,7 +585,7 @@ def separateComponents(b, path, APPROXIMATEWINDOWS, ADDBOUNDINGBOX, ADDBOUNDINGB
         output[semanticSurface] = []
 
     # get the building id for the building
-    buildingid = b.xpath("@g:id", namespaces={'g': ns_gml})
+    buildingid = ns.gmlId(b)
 
     # Handle the case when a building has no gml:id - This should however never occur...
     if not buildingid:
@@ -639,85 +597,61 @@ def separateComponents(b, path, APPROXIMATEWINDOWS, ADDBOUNDINGBOX, ADDBOUNDINGB
         pathToBoundingBoxFile = IMPORTBOUNDINGBOX + "/" + str(buildingid) + ".json"
         tr_1 = importBoundingBox(pathToBoundingBoxFile=pathToBoundingBoxFile, trans_param=translation_parameters)
 
-    if config.getVersion() != 3:
-        openings = []
-        openingpolygons = []
-        for child in b.getiterator():
-            if child.tag == '{%s}opening' % ns_bldg:
-                openings.append(child)
-                for o in child.findall('.//{%s}Polygon' % ns_gml):
-                    openingpolygons.append(o)
-
-        for o in openings:
-            # print("approximate windows: ", APPROXIMATEWINDOWS)
-            if APPROXIMATEWINDOWS:
-                processWithApproximatedWindows(o, path, buildingid, overall_counter, tr_1=tr_1,
-                                               translation_parameters=translation_parameters, b_counter=b_counter)
-            if not APPROXIMATEWINDOWS:
-                processOpening(o, path, buildingid, overall_counter, tr_1, trans_param=translation_parameters,
-                               b_counter=b_counter)
-            if ADDBOUNDINGBOXJSON:
-                writeBBOXJSON(b, overall_counter=overall_counter, path=path, b_counter=b_counter,
-                              trans_param=translation_parameters)
-            overall_counter += 1
-
-    if config.getVersion() == 3:
-        openingpolygons = []
-        print("Component separation for CityGML 3.0 is not implemented yet.")
-        # todo: muss noch implementiert werden
+    # -- Bucket the openings and the semantic surfaces in one walk of the building
+    building = m3dm.BuildingContext(b, ns, semanticSurfaces)
+
+    # -- The openings are con:fillingSurface elements in CityGML 3.0, see m3dm.semanticTags3
+    hulls = [None] * len(building.openings)
+    if APPROXIMATEWINDOWS:
+        # -- The hulls of all the openings of the building are computed in one call
+        hulls = compute_convex_hulls([getAllExteriorPoints(polys, ns, offset) for o, polys in building.openings])
+    for (o, polys), hull in zip(building.openings, hulls):
+        # print("approximate windows: ", APPROXIMATEWINDOWS)
+        if APPROXIMATEWINDOWS:
+            processWithApproximatedWindows(o, path, buildingid, overall_counter, tr_1=tr_1,
+                                           translation_parameters=translation_parameters, b_counter=b_counter,
+                                           ns=ns, index=index, hull=hull, offset=offset)
+        if not APPROXIMATEWINDOWS:
+            processOpening(o, path, buildingid, overall_counter, tr_1, trans_param=translation_parameters,
+                           b_counter=b_counter, ns=ns, index=index, offset=offset)
+        if ADDBOUNDINGBOXJSON:
+            writeBBOXJSON(bounding_box_points, overall_counter=overall_counter, path=path, b_counter=b_counter,
+                          trans_param=translation_parameters)
+        overall_counter += 1
 
     # -- Process other thematic boundaries
     for cl in output:
-        cls = []
-        for child in b.getiterator():
-            if child.tag == '{%s}%s' % (ns_bldg, cl):
-                cls.append(child)
-
-        for feature in cls:
+        for feature, polys in building.features(cl):
             # -- If it is the first feature, print the object identifier
-            unique_identifier = feature.xpath("@g:id", namespaces={
-                'g': ns_gml})
+            unique_identifier = ns.gmlId(feature)
             if str(unique_identifier) != "[]" or str(unique_identifier) == "[]":
                 cleaned_filename = str(unique_identifier)
                 # -- This is not supposed to happen, but just to be sure...
-                if feature.tag == '{%s}Window' % ns_bldg or feature.tag == '{%s}Door' % ns_bldg:
+                if feature.tag in ns.openingTags:
                     continue
                 tag = feature.tag
                 _, cleaned_tag = separate_string(tag)
                 # -- Find all polygons in this semantic boundary hierarchy
                 poly_t = []
                 t_ges = []
-                number_of_polygons = len(feature.findall('.//{%s}Polygon' % ns_gml))
+                number_of_polygons = len(polys)
                 pcounter = 0
                 print(f"there are {number_of_polygons} polygons there!")
-                for p in feature.findall('.//{%s}Polygon' % ns_gml):
-                    found_opening = False
-                    for optest in openingpolygons:
-                        if p == optest:
-                            found_opening = True
-                            break
+                for p in polys:
                     # -- If there is an opening skip it
-                    if found_opening:
+                    if building.isOpening(p):
                         pass
                     else:
                         # -- Decompose the polygon into exterior and interior
-                        e, i = m3dm.polydecomposer(p)
-                        # -- Points forming the exterior LinearRing
-                        epoints = m3dm.GMLpoints(e[0])
-                        # -- Clean recurring points, except the last one
-                        last_ep = epoints[-1]
-                        epoints_clean = list(remove_reccuring(epoints))
-                        epoints_clean.append(last_ep)
+                        e, i = m3dm.polydecomposer(p, ns)
+                        # -- Points forming the exterior LinearRing, without recurring points except the last one
+                        epoints_clean = clean_ring(m3dm.GMLpointsArray(e[0], ns, offset))
 
                         # -- LinearRing(s) forming the interior
                         irings = []
                         for iring in i:
-                            ipoints = m3dm.GMLpoints(iring)
                             # -- Clean them in the same manner as the exterior ring
-                            last_ip = ipoints[-1]
-                            ipoints_clean = list(remove_reccuring(ipoints))
-                            ipoints_clean.append(last_ip)
-                            irings.append(ipoints_clean)
+                            irings.append(clean_ring(m3dm.GMLpointsArray(iring, ns, offset)))
 
                         # Applying the translation parameters
                         e_trans, i_trans = addTranslationParameters(e=epoints_clean, i=irings,
@@ -746,10 +680,10 @@ def separateComponents(b, path, APPROXIMATEWINDOWS, ADDBOUNDINGBOX, ADDBOUNDINGB
 
                 filename = path + str(b_counter) + "_" + str(overall_counter) + ".obj"
                 if ADDBOUNDINGBOXJSON:
-                    writeBBOXJSON(b, overall_counter=overall_counter, path=path, b_counter=b_counter,
-                                  trans_param=translation_parameters)
+                    writeBBOXJSON(bounding_box_points, overall_counter=overall_counter, path=path,
+                                  b_counter=b_counter, trans_param=translation_parameters)
                 write_obj_file(t_ges, filename, str(feature.tag), buildingid, cleaned_filename, overall_counter, path,
-                               tr_1, translation_parameters=translation_parameters)
+                               tr_1, translation_parameters=translation_parameters, index=index)
                 overall_counter += 1
 
     print("Segmentation finished!")
@@ -1,7 +0,0 @@
-def setVersion(version):
- global VERSION
- VERSION = version
- print(f"version: {VERSION}")
-
-def getVersion():
-    return VERSION
\ No newline at end of file
@@ -0,0 +1,1093 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# This code is part of the CityGML2OBJs package
+
+# Copyright (c) 2014
+# Filip Biljecki
+# Delft University of Technology
+# fbiljecki@gmail.com
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+# -- Conversion of single buildings (and other city objects) into blocks of OBJ faces.
+# -- A block holds the vertices and faces of each class indexed locally, so blocks can be produced
+# -- independently (e.g. in a pool of worker processes) and merged to the dataset afterwards.
+
+import markup3dmodule
+import polygon3dmodule
+import meshwritermodule
+import componentseparationmodule as csm
+import CityGMLTranslation as cgt
+from lxml import etree
+from decimal import Decimal
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import copy
+import glob
+import itertools
+import os
+import shutil
+import tempfile
+import time
+
+# -- Text to be printed at the beginning of each OBJ
+header = """# Converted from CityGML to OBJ with CityGML2OBJs.
+# Conversion tool developed by Filip Biljecki, TU Delft <fbiljecki@gmail.com>, see more at Github:
+# https://github.com/tudelft3d/CityGML2OBJs
+#
+"""
+
+# -- Easy to modify list of thematic boundaries
+semanticSurfaces = ['GroundSurface', 'WallSurface', 'RoofSurface', 'ClosureSurface', 'CeilingSurface',
+                    'InteriorWallSurface', 'FloorSurface', 'OuterCeilingSurface', 'OuterFloorSurface', 'Door',
+                    'Window']
+
+
+# -- Ways of triangulating a polygon: the fast paths and the Triangle library
+triangulationPaths = ['fan', 'quad', 'Triangle']
+
+# -- Non-building city objects which are converted, as (prefix of the name space, name) pairs
+otherObjects = (('tran', 'Road'), ('veg', 'PlantCover'), ('gen', 'GenericCityObject'), ('frn', 'CityFurniture'),
+                ('dem', 'Relief'), ('tun', 'Tunnel'), ('wtr', 'WaterBody'), ('brid', 'Bridge'))
+
+
+class ConversionOptions:
+    """Settings of the converter, see the arguments of CityGML2OBJs.py for their meaning.
+    Building-wise settings are needed by the worker processes as well, so the object has to stay picklable."""
+
+    def __init__(self, semantics=False, objects=False, attribute=False, validation=False, translate=False,
+                 skiptri=False, translate_citygml=False, translate_citygml_write=False, separate_components=False,
+                 approximate_windows=False, add_bounding_box=False, import_bounding_box=None,
+                 add_bounding_box_json=False, translate_buildings=False, translate_offset=False, streaming=False, workers=1,
+                 file_workers=1, vertex_tolerance=None, fast_triangulation=False, batch_triangulation=False, output_format='obj', min_value=None, max_value=None, res=101):
+        self.semantics = semantics
+        self.objects = objects
+        self.attribute = attribute
+        self.validation = validation
+        self.translate = translate
+        self.skiptri = skiptri
+        self.translate_citygml = translate_citygml
+        self.translate_citygml_write = translate_citygml_write
+        self.separate_components = separate_components
+        self.approximate_windows = approximate_windows
+        self.add_bounding_box = add_bounding_box
+        self.import_bounding_box = import_bounding_box
+        self.add_bounding_box_json = add_bounding_box_json
+        self.translate_buildings = translate_buildings
+        # -- Apply the translation of -tC/-tCw to the parsed coordinates instead of rewriting the document
+        self.translate_offset = translate_offset
+        self.streaming = streaming
+        self.workers = workers
+        # -- Number of files converted at the same time by convert
+        self.file_workers = file_workers
+        self.vertex_tolerance = vertex_tolerance
+        self.fast_triangulation = fast_triangulation
+        self.batch_triangulation = batch_triangulation
+        self.output_format = output_format
+        # -- Colour the surfaces based on the normalised value of the attribute. If the range of the values is not
+        # -- given, it is found for each file, in its tree or in a streaming pre-pass with -str (see attribute_range)
+        self.min_value = min_value
+        self.max_value = max_value
+        # -- Number of classes (colours)
+        self.res = res
+        # -- Table of the materials, made for each conversion from its range (see for_conversion)
+        self.bins = None
+
+    def classes(self):
+        """Classes (OBJ files) the buildings are converted into."""
+        if self.semantics:
+            return ['All'] + semanticSurfaces
+        return ['All']
+
+    def for_conversion(self, min_value, max_value):
+        """Copy of the settings for the conversion of one file, with the given range of the values of the attribute
+        and the table of the materials of that range. The settings it is made from are left as they are."""
+        options = copy.copy(self)
+        options.min_value = min_value
+        options.max_value = max_value
+        options.bins = None
+        if options.attribute and min_value is not None and max_value is not None:
+            options.bins = MaterialBins(min_value, max_value, options.res)
+        # -- A binary glTF is made of triangles, so the polygons are triangulated as without -p
+        if options.output_format == 'glb':
+            options.skiptri = False
+        return options
+
+    def material(self, att):
+        """Name of the material of the value of the attribute, see for_conversion."""
+        return self.bins.material(att)
+
+
+class VertexIndex:
+    """Hash-indexed list of unique vertices.
+    Behaves like the list of vertices it replaces (append, len, iteration, item access), but the index of a
+    vertex is looked up by its coordinate tuple instead of scanning the list.
+    If a tolerance is given, coordinates are quantized to multiples of it, so vertices falling into the same
+    cell share one index (the first one encountered is kept)."""
+
+    def __init__(self, tolerance=None):
+        self.tolerance = tolerance
+        self.vertices = []
+        self.lookup = {}
+
+    def key(self, point):
+        """Hashable key of a vertex."""
+        if self.tolerance:
+            return tuple(round(c / self.tolerance) for c in point)
+        return tuple(point)
+
+    def add(self, point):
+        """Returns the (zero-based) index of the vertex, appending it if it is not indexed yet."""
+        k = self.key(point)
+        idx = self.lookup.get(k)
+        if idx is None:
+            idx = len(self.vertices)
+            self.lookup[k] = idx
+            self.vertices.append(point)
+        return idx
+
+    def append(self, point):
+        self.add(point)
+
+    def __len__(self):
+        return len(self.vertices)
+
+    def __iter__(self):
+        return iter(self.vertices)
+
+    def __getitem__(self, idx):
+        return self.vertices[idx]
+
+
+class ObjBlock:
+    """Vertices and faces of one building (or of all the other city objects) for each class.
+    Faces are stored as tuples of one-based local indices of the vertices, other lines (objects, materials)
+    as strings, so that the block can be merged to the dataset by shifting the indices."""
+
+    def __init__(self, classes, tolerance=None):
+        self.vertices = {}
+        self.faces = {}
+        for cl in classes:
+            self.vertices[cl] = VertexIndex(tolerance)
+            self.faces[cl] = []
+        # -- Statistic parameter
+        self.atts = []
+        # -- How often each way of triangulating the polygons was taken
+        self.triangulations = dict.fromkeys(triangulationPaths, 0)
+        # -- Polygons waiting for the validation and the batched triangulation.
+        # -- Each of them holds the place of its faces in the faces of its class until the queue is flushed
+        self.queue = []
+
+
+def get_index(point, list_vertices, shift=0):
+    """Index the vertices.
+    The third option is for incorporating a local index (building-level) to the global one (dataset-level)."""
+    """Unique identifier and indexer of vertices."""
+    return list_vertices.add(point) + 1 + shift, list_vertices
+
+
+def remove_reccuring(list_vertices):
+    """Removes recurring vertices, which messes up the triangulation.
+    Inspired by http://stackoverflow.com/a/1143432"""
+    # last_point = list_vertices[-1]
+    list_vertices_without_last = list_vertices[:-1]
+    found = set()
+    for item in list_vertices_without_last:
+        if tuple(item) not in found:
+            yield item
+            found.add(tuple(item))
+
+
+def clean_ring(points):
+    """Converts the points of a ring parsed by markup3dmodule.GMLpointsArray to a list,
+    without the recurring points except the last one."""
+    listPoints = points.tolist()
+    last_point = listPoints[-1]
+    listPoints_clean = list(remove_reccuring(listPoints))
+    listPoints_clean.append(last_point)
+    return listPoints_clean
+
+
+# -- Colouring function
+class MaterialBins:
+    """Precomputed table of the materials of an attribute.
+    The materials are res evenly spaced values between 0 and 1 (rounded to 4 decimals), the one of a value of
+    the attribute is the nearest to its normalised value, the lower one in case of a tie. It is found with a
+    binary search of the table."""
+
+    def __init__(self, min_value, max_value, res):
+        self.min_value = min_value
+        self.max_value = max_value
+        # -- Get rid of floating point errors
+        self.values = np.array([round(x, 4) for x in np.linspace(0, 1, res).tolist()])
+        self.names = [str(x) for x in self.values.tolist()]
+
+    def material(self, att):
+        """Name of the material of the value of the attribute."""
+        # -- Normalise the attribute
+        if self.max_value == self.min_value:
+            v = 0.0
+        else:
+            v = float(att - self.min_value) / (self.max_value - self.min_value)
+        # -- The nearest value is the one before or the one at the insertion point
+        i = int(np.searchsorted(self.values, v))
+        if i == len(self.values):
+            i -= 1
+        elif i > 0 and abs(self.values[i - 1] - v) <= abs(self.values[i] - v):
+            i -= 1
+        return self.names[i]
+
+
+def fast_triangulate(epoints, irings, block, options):
+    """Triangulates a polygon through one of the fast paths if invoked and possible, otherwise returns None.
+    Counts the path taken in the block."""
+    if options.fast_triangulation:
+        t, path = polygon3dmodule.fastTriangulation(epoints, irings)
+        if t is not None:
+            block.triangulations[path] += 1
+            return t
+    return None
+
+
+def triangulate(epoints, irings, block, options):
+    """Triangulates a polygon, through one of the fast paths if invoked and possible, otherwise with Triangle.
+    Counts the path taken in the block."""
+    t = fast_triangulate(epoints, irings, block, options)
+    if t is not None:
+        return t
+    block.triangulations['Triangle'] += 1
+    return polygon3dmodule.triangulation(epoints, irings)
+
+
+def queue_polygon(poly, epoints, irings, cl, block, material=None):
+    """Queues a polygon in the block, to be validated and triangulated with the other polygons of the block."""
+    item = {'polygon': poly, 'exterior': epoints, 'interiors': irings, 'class': cl, 'material': material,
+            'valid': True, 'triangles': None}
+    block.queue.append(item)
+    block.faces[cl].append(item)
+
+
+def validate_queue(block, ns):
+    """Validates all the rings of the polygons queued in the block at once.
+    Reports the invalid polygons, which are skipped."""
+    rings = [item['exterior'] for item in block.queue]
+    for item in block.queue:
+        rings.extend(item['interiors'])
+    checks = polygon3dmodule.validateRings(rings).tolist()
+    interior = len(block.queue)
+    for item, check in zip(block.queue, checks):
+        # -- The interior rings are checked only if the exterior one is valid, and their problems are not reported
+        item['valid'] = check == 0 and not any(checks[interior:interior + len(item['interiors'])])
+        interior += len(item['interiors'])
+        if not item['valid']:
+            for failed, message in polygon3dmodule.invalidityMessages:
+                if check & failed:
+                    print("\t\t" + message)
+            # Get the gml:id of the Polygon if it exists
+            polyid = ns.gmlId(item['polygon'])
+            if polyid:
+                polyid = polyid[0]
+                print("\t\t!! Detected an invalid polygon (%s). Skipping..." % polyid)
+            else:
+                print("\t\t!! Detected an invalid polygon. Skipping...")
+
+
+def flush_queue(block, options, ns):
+    """Validates and triangulates the polygons queued in the block, the latter with one batched call of Triangle
+    if invoked, and puts their faces in the place of the queued polygons."""
+    if not block.queue:
+        return
+    # -- If the polygon validation option is enabled
+    if options.validation:
+        validate_queue(block, ns)
+    waiting = []
+    for item in block.queue:
+        if not item['valid']:
+            item['triangles'] = []
+        elif options.skiptri:
+            # -- Triangulation is skipped, polygons are converted directly to faces
+            # -- The last point is removed since it's equal to the first one
+            item['triangles'] = [item['exterior'][:-1]]
+        elif options.batch_triangulation:
+            item['triangles'] = fast_triangulate(item['exterior'], item['interiors'], block, options)
+            if item['triangles'] is None:
+                waiting.append(item)
+        else:
+            # -- Triangulate polys
+            try:
+                item['triangles'] = triangulate(item['exterior'], item['interiors'], block, options)
+            except:
+                item['triangles'] = []
+    if waiting:
+        block.triangulations['Triangle'] += len(waiting)
+        polygons = [(item['exterior'], item['interiors']) for item in waiting]
+        for item, t in zip(waiting, polygon3dmodule.batchTriangulation(polygons)):
+            item['triangles'] = t
+    # -- The vertices are indexed in the order the polygons were queued
+    lines = {}
+    for item in block.queue:
+        lines[id(item)] = []
+        add_faces(item['triangles'], item['class'], block, options, item['material'], lines[id(item)])
+    for cl in set(item['class'] for item in block.queue):
+        faces = []
+        for line in block.faces[cl]:
+            if isinstance(line, dict):
+                faces.extend(lines[id(line)])
+            else:
+                faces.append(line)
+        block.faces[cl] = faces
+    block.queue = []
+
+
+def add_faces(t, cl, block, options, material=None, faces=None):
+    """Adds the triangles/polygons as faces of a specific semantic class of a block, or to the given faces."""
+    if faces is None:
+        faces = block.faces[cl]
+    if material:
+        usemtl = "usemtl " + options.material(material) + "\n"
+    for tri in t:
+        # -- For each point in the triangle/polygon (face) get the local index "v" or add it to the index
+        f = []
+        for ep in range(0, len(tri)):
+            v, block.vertices[cl] = get_index(tri[ep], block.vertices[cl])
+            f.append(v)
+        # -- Add the material if invoked. The writer drops it if it is the current one anyway
+        if material:
+            faces.append(usemtl)
+        # -- Store all together
+        faces.append(tuple(f))
+
+
+def poly_to_obj(poly, cl, block, options, ns, material=None, offset=None):
+    """Main conversion function of one polygon to one or more faces in OBJ,
+    in a specific semantic class of a block. Supports assigning a material.
+    offset is added to the coordinates, see markup3dmodule.Namespaces.objectOffset."""
+    # -- Decompose the polygon into exterior and interior
+    e, i = markup3dmodule.polydecomposer(poly, ns)
+    # -- Points forming the exterior LinearRing, without recurring points except the last one
+    epoints_clean = clean_ring(markup3dmodule.GMLpointsArray(e[0], ns, offset))
+
+    # -- LinearRing(s) forming the interior
+    irings = []
+    for iring in i:
+        # -- Clean them in the same manner as the exterior ring
+        irings.append(clean_ring(markup3dmodule.GMLpointsArray(iring, ns, offset)))
+    # -- If the polygon validation option is enabled, or the batched triangulation, the polygon is processed
+    # -- together with the other polygons of the block
+    if options.validation or (options.batch_triangulation and not options.skiptri):
+        queue_polygon(poly, epoints_clean, irings, cl, block, material)
+        return
+    try:
+        if options.skiptri:
+            t = [epoints_clean[:-1]]
+        else:
+            t = triangulate(epoints_clean, irings, block, options)
+    except:
+        t = []
+
+    # -- Process the triangles/polygons
+    add_faces(t, cl, block, options, material)
+
+
+def building_to_block(b, b_counter, options, ns):
+    """Converts one <bldg:Building> into a block of faces.
+    The building counter is used as the name of the object if the building has no gml:id."""
+    block = ObjBlock(options.classes(), options.vertex_tolerance)
+    offset = ns.objectOffset(b)
+
+    # -- If the object option is on, get the name for each building or create one
+    if options.objects:
+        ob = ns.gmlId(b)
+        if not ob:
+            ob = b_counter
+        else:
+            ob = ob[0]
+
+    # -- Add the object identifier
+    if options.objects:
+        block.faces['All'].append('o ' + str(ob) + '\n')
+
+    # -- Add the attribute for the building
+    if options.attribute:
+        for ch in b.getchildren():
+            if ch.tag == ns.tag('citygml', 'yearlyIrradiation'):
+                bAttVal = float(ch.text)
+
+    # -- OBJ with all surfaces in the same bin
+    polys = markup3dmodule.polygonFinder(b, ns)
+    # -- Process each surface
+    for poly in polys:
+        if options.attribute:
+            poly_to_obj(poly, 'All', block, options, ns, bAttVal, offset)
+            if options.attribute == 3:
+                block.atts.append(bAttVal)
+        else:
+            poly_to_obj(poly, 'All', block, options, ns, offset=offset)
+
+    # -- Semantic decomposition, with taking special care about the openings
+    if options.semantics:
+        # -- Bucket the openings and the thematic boundaries in one walk of the building
+        building = markup3dmodule.BuildingContext(b, ns, semanticSurfaces)
+
+        # -- First take care about the openings since they can mix up
+        for o, polys in building.openings:
+            for child in o.iter(ns.Window, ns.Door):
+                if child.tag == ns.Window:
+                    t = 'Window'
+                else:
+                    t = 'Door'
+                for poly in polys:
+                    poly_to_obj(poly, t, block, options, ns, offset=offset)
+
+        # -- Process other thematic boundaries
+        for cl in semanticSurfaces:
+            # -- Is this the first feature of this object?
+            firstF = True
+            for feature, polys in building.features(cl):
+                # -- If it is the first feature, print the object identifier
+                unique_identifier = ns.gmlId(feature)
+                if options.objects and firstF:
+                    block.faces[cl].append('o ' + str(ob) + "_" + str(unique_identifier) + '\n')
+
+                    firstF = False
+                # -- This is not supposed to happen, but just to be sure...
+                if feature.tag in ns.openingTags:
+                    continue
+
+                # -- All polygons in this semantic boundary hierarchy
+                for p in polys:
+                    if options.attribute == 1 or options.attribute == 2:
+                        # -- Flush the previous value
+                        attVal = None
+                        if cl == 'RoofSurface':
+                            # -- Silly way but it works, as I can't get the above xpath to work for some reason
+                            for ch in p.getchildren():
+                                if options.attribute == 1:
+                                    if ch.tag == ns.tag('citygml', 'irradiation'):
+                                        attVal = float(ch.text)
+                                        block.atts.append(attVal)
+                                elif options.attribute == 2:
+                                    if ch.tag == ns.tag('citygml', 'totalIrradiation'):
+                                        attVal = float(ch.text)
+                                        block.atts.append(attVal)
+                    elif options.attribute == 3:
+                        attVal = None
+                        if cl == 'RoofSurface':
+                            attVal = bAttVal
+                    else:
+                        # -- If the attribute option is off, pass no material
+                        attVal = None
+                    # -- If there is an opening skip it
+                    if building.isOpening(p):
+                        pass
+                    else:
+                        # -- Finally process the polygon
+                        poly_to_obj(p, cl, block, options, ns, attVal, offset)
+    flush_queue(block, options, ns)
+    return block
+
+
+def other_to_block(oth, block, options, ns):
+    """Converts one of the other city objects into the 'Other' class of the block.
+    All of them share one block, and hence one index of vertices."""
+    offset = ns.objectOffset(oth)
+    polys = markup3dmodule.polygonFinder(oth, ns)
+    # -- Process each surface
+    for poly in polys:
+        poly_to_obj(poly, 'Other', block, options, ns, offset=offset)
+    flush_queue(block, options, ns)
+
+
+class ObjWriter:
+    """Streaming writer of the OBJ file of one class.
+    The faces of each merged block are written to a temporary file right away, and so are its vertices, so the
+    output does not have to be kept in memory. The OBJ file is assembled from the two at the end.
+    If the coordinates are translated, the smallest vertex is known only at the end, so the vertices are kept
+    as binary doubles until then."""
+
+    extension = ".obj"
+
+    # -- Number of vertices formatted at once when the file is assembled
+    chunk = 65536
+
+    def __init__(self, head, directory=None, translate=False):
+        self.head = head
+        self.translate = translate
+        # -- Number of vertices written so far
+        self.count = 0
+        # -- Smallest vertex (see polygon3dmodule.smallestPoint), if the coordinates are translated
+        self.smallest = None
+        # -- Current 'usemtl' line, it carries on from one block to the next
+        self.material = None
+        self.faces = tempfile.TemporaryFile(mode='w+', dir=directory)
+        if translate:
+            self.vertices = tempfile.TemporaryFile(mode='w+b', dir=directory)
+        else:
+            self.vertices = tempfile.TemporaryFile(mode='w+', dir=directory)
+
+    def add_block(self, faces, vertices):
+        """Writes the faces and the vertices of a block. The local indices of the faces are shifted by
+        the number of vertices written so far."""
+        shift = self.count
+        lines = []
+        for line in faces:
+            if isinstance(line, str):
+                # -- The material is written only when it changes
+                if line.startswith('usemtl '):
+                    if line == self.material:
+                        continue
+                    self.material = line
+                lines.append(line)
+            else:
+                lines.append("f " + "".join(str(v + shift) + " " for v in line) + "\n")
+        self.faces.write(''.join(lines))
+        if len(vertices) == 0:
+            return
+        if self.translate:
+            smallest = tuple(min(vertices, key=lambda x: (x[0], x[1], x[2])))
+            if self.smallest is None or smallest < self.smallest:
+                self.smallest = smallest
+            self.vertices.write(np.array(list(vertices), dtype=np.float64).tobytes())
+        else:
+            self.vertices.write(''.join(vertex_line(vertex) for vertex in vertices))
+        self.count += len(vertices)
+
+    def write(self, path, origin=None):
+        """Assembles the OBJ file. The vertices are translated by the origin, if they are kept as binary."""
+        with open(path, "w") as obj_file:
+            obj_file.write(''.join(self.head))
+            obj_file.write("\n")
+            self.vertices.seek(0)
+            if self.translate:
+                while True:
+                    data = self.vertices.read(self.chunk * 24)
+                    if not data:
+                        break
+                    chunk = (np.frombuffer(data, dtype=np.float64).reshape(-1, 3) - origin).tolist()
+                    obj_file.write(''.join(vertex_line(vertex) for vertex in chunk))
+            else:
+                shutil.copyfileobj(self.vertices, obj_file)
+            obj_file.write("\n")
+            self.faces.seek(0)
+            shutil.copyfileobj(self.faces, obj_file)
+
+    def close(self):
+        self.faces.close()
+        self.vertices.close()
+
+
+def vertex_line(vertex):
+    """Vertex in the OBJ format."""
+    return "v" + " " + str(vertex[0]) + " " + str(vertex[1]) + " " + str(vertex[2]) + "\n"
+
+
+def merge_block(block, writers, atts, triangulations=None):
+    """Merges a block to the dataset, by writing its faces and vertices with the writer of each class.
+    The local indices of the faces are shifted by the number of vertices the dataset has so far in each class."""
+    for cl in block.faces:
+        writers[cl].add_block(block.faces[cl], block.vertices[cl])
+    atts.extend(block.atts)
+    if triangulations is not None:
+        for path in block.triangulations:
+            triangulations[path] += block.triangulations[path]
+
+
+# -- Pool of worker processes converting the buildings of one file in parallel
+def init_worker(version, options, offset):
+    """Initializes a worker process with the settings of the file being converted."""
+    global worker_options
+    global worker_ns
+    worker_options = options
+    # -- The compiled expressions of the name space context are made again in each worker
+    worker_ns = markup3dmodule.Namespaces(version)
+    worker_ns.offset = offset
+
+
+def convert_batch(batch):
+    """Converts a batch of serialized buildings in a worker process.
+    The batch is a list of (building counter, XML of the building) pairs; returns the list of their blocks."""
+    blocks = []
+    for b_counter, xml in batch:
+        b = etree.fromstring(xml, etree.XMLParser(huge_tree=True))
+        blocks.append(building_to_block(b, b_counter, worker_options, worker_ns))
+    return blocks
+
+
+# -- Conversion of an entire CityGML file
+def getNamespaces(root):
+    """Determines the version of the CityGML file from its root and returns it with a new name space context
+    of that version (see markup3dmodule.Namespaces)."""
+    # If 1.0
+    if root.tag == "{http://www.opengis.net/citygml/1.0}CityModel":
+        version = 1
+    # added by Th_Fr
+    elif root.tag == "{http://www.opengis.net/citygml/3.0}CityModel":
+        version = 3
+    # -- Else probably means 2.0
+    else:
+        version = 2
+    return version, markup3dmodule.Namespaces(version)
+
+
+def is_other(child, ns):
+    """Checks if a child of a <cityObjectMember> is one of the non-building city objects that are converted."""
+    return child.tag in ns.tagSet(*otherObjects)
+
+
+def stream_city_objects(fullpath, ns):
+    """Parses the <cityObjectMember> elements of a CityGML file one by one. Each of them is freed, with the ones
+    before it, when the next one is requested, so only one cityObject at a time has to be kept in memory."""
+    for event, cityObject in etree.iterparse(fullpath, events=('end',), tag=ns.tag('citygml', 'cityObjectMember'),
+                                             huge_tree=True):
+        yield cityObject
+        # -- Get rid of the processed cityObjectMember and of the ones before it
+        cityObject.clear()
+        while cityObject.getprevious() is not None and cityObject.getprevious().tag == cityObject.tag:
+            cityObject.getparent().remove(cityObject.getprevious())
+
+
+def attribute_range(cityObjects, options, ns):
+    """Finds the range of the values of the attribute the surfaces are coloured by (-a) in the <cityObjectMember>
+    elements, from the tree in memory or streamed in a pre-pass over the CityGML file (see stream_city_objects).
+    These are the values of the buildings and, for the semantic roof surfaces with -a 1 or 2, the values of their
+    polygons. Returns (min, max), or None if there are no values."""
+    if options.attribute == 1:
+        polygon_tag = ns.tag('citygml', 'irradiation')
+    elif options.attribute == 2:
+        polygon_tag = ns.tag('citygml', 'totalIrradiation')
+    else:
+        polygon_tag = None
+    low = None
+    high = None
+    for cityObject in cityObjects:
+        for b in cityObject.iterchildren(ns.tag('bldg', 'Building')):
+            values = [float(ch.text) for ch in b.iterchildren(ns.tag('citygml', 'yearlyIrradiation'))]
+            if options.semantics and polygon_tag is not None:
+                for roof, polys in markup3dmodule.classifyBuilding(b, ns, ['RoofSurface'])['RoofSurface']:
+                    for p in polys:
+                        values.extend(float(ch.text) for ch in p.iterchildren(polygon_tag))
+            if values:
+                if low is None:
+                    low = min(values)
+                    high = max(values)
+                else:
+                    low = min(low, min(values))
+                    high = max(high, max(values))
+    if low is None:
+        return None
+    return low, high
+
+
+class FileConversion:
+    """Conversion of one CityGML file into OBJ file(s) in the result directory.
+    All the state of the conversion is kept here, so several files can be converted at the same time."""
+
+    # -- Number of buildings sent to a worker process at once
+    batch_size = 64
+
+    def __init__(self, fullpath, result, options):
+        self.fullpath = fullpath
+        # -- The document the city objects are streamed from, the translated one with -tC/-tCw
+        self.source = fullpath
+        self.result = result
+        self.options = options
+        filename = os.path.basename(fullpath)
+        self.filename = filename[:filename.rfind('.')]
+        self.start_time = time.time()
+
+        # -- Writers of the OBJ of each class, the faces and vertices are streamed to them
+        self.writers = {}
+        # -- Statistic parameter
+        self.atts = []
+        self.triangulations = dict.fromkeys(triangulationPaths, 0)
+        # -- Pool of worker processes converting the buildings in parallel
+        self.pool = None
+        self.pending = []
+        self.batch = []
+        # -- Written OBJ files
+        self.written = []
+        # -- Index of the separated components, and whether the reference system was added to it
+        self.index = csm.IndexFiles()
+        self.crs_added = False
+
+    def setup_output(self):
+        """Prepares the writer of each class."""
+        options = self.options
+        # -- The header of the OBJ, with the material library if invoked
+        head = [header]
+        if options.attribute:
+            head.append("mtllib colormap.mtl\n")
+        # -- This denotes the writer in which all surfaces are put. It is later ignored in the semantic option was invoked.
+        self.writers['All'] = self.new_writer(head)
+        # -- If the semantic option was invoked, this part adds additional writers.
+        if options.semantics:
+            for semanticSurface in semanticSurfaces:
+                self.writers[semanticSurface] = self.new_writer(head)
+        self.writers['Other'] = self.new_writer([])
+
+    def new_writer(self, head):
+        """Writer of one class in the output format."""
+        options = self.options
+        if options.output_format == 'glb':
+            return meshwritermodule.GlbWriter(head, self.result, options.translate, options.res)
+        elif options.output_format == 'ply':
+            return meshwritermodule.PlyWriter(head, self.result, options.translate, options.res)
+        return ObjWriter(head, self.result, options.translate)
+
+    def run(self):
+        """Converts the file and returns the list of written OBJ files."""
+        options = self.options
+        self.stream = options.streaming
+
+        if self.stream:
+            # -- Only the root element is read here to determine the version, the rest is streamed later
+            CITYGML = None
+            event, root = next(etree.iterparse(self.fullpath, events=('start',), huge_tree=True))
+        else:
+            # -- Reading and parsing the CityGML file(s)
+            CITYGML = etree.parse(self.fullpath)
+            # -- Getting the root of the XML tree
+            root = CITYGML.getroot()
+        self.root = root
+        # -- Determine CityGML version
+        version, ns = getNamespaces(root)
+        print("CityGML %d.0" % version)
+        self.ns = ns
+
+        # -- Find the range of the values of the attribute for colouring the surfaces, if it is not given
+        min_value = options.min_value
+        max_value = options.max_value
+        if options.attribute and (min_value is None or max_value is None):
+            if self.stream:
+                cityObjects = stream_city_objects(self.fullpath, ns)
+            else:
+                cityObjects = root.iter(ns.tag('citygml', 'cityObjectMember'))
+            value_range = attribute_range(cityObjects, options, ns)
+            if value_range is not None:
+                print("\tRange of the attribute for the colours:", value_range[0], '--', value_range[1])
+                if min_value is None:
+                    min_value = value_range[0]
+                if max_value is None:
+                    max_value = value_range[1]
+        # -- The settings of this conversion, with its own table of materials
+        options = options.for_conversion(min_value, max_value)
+        self.options = options
+
+        # Changes by Th_FR
+        directory = os.path.join(os.path.dirname(self.fullpath), '')
+        # -- Offset of the coordinates, if the translation into the local CRS is applied while they are parsed
+        offset = None
+        if options.translate_offset and (options.translate_citygml or options.translate_citygml_write):
+            offset = cgt.getLocalCRSOffset(None if self.stream else root, self.fullpath, self.filename, ns['gml'],
+                                           self.result, write2file=bool(options.translate_citygml_write),
+                                           applyHeight=Decimal("0"))
+        elif self.stream and (options.translate_citygml or options.translate_citygml_write):
+            # -- The translated document is written element by element, and it is the one streamed afterwards
+            self.source = cgt.translateToLocalCRSStreaming(self.fullpath, self.filename, ns['gml'], ns['citygml'],
+                                                           self.result,
+                                                           write2file=bool(options.translate_citygml_write),
+                                                           applyHeight=Decimal("0"), localDirectory=directory)
+        elif options.translate_citygml:
+            cgt.translateToLocalCRS(CITYGML, self.filename, root, ns['bldg'], ns['gml'], ns['citygml'], ns['frn'],
+                                    ns['veg'], self.result, write2file=False,
+                                    applyHeight=Decimal("0"), localDirectory=directory)  # Todo: by TH_Fr: Diese Funktion ist noch nicht fertig
+
+        if options.translate_citygml_write and not self.stream and offset is None:
+            cgt.translateToLocalCRS(CITYGML, self.filename, root, ns['bldg'], ns['gml'], ns['citygml'], ns['frn'],
+                                    ns['veg'], self.result, write2file=True, applyHeight=Decimal("0"),
+                                    localDirectory=directory)
+        # End of changes by Th_FR
+        ns.offset = offset
+
+        self.setup_output()
+        # -- All the other city objects share one block, and hence one index of vertices
+        other_block = ObjBlock(['Other'], options.vertex_tolerance)
+
+        if options.workers > 1 and not options.separate_components:
+            self.pool = ProcessPoolExecutor(max_workers=options.workers, initializer=init_worker,
+                                            initargs=(version, options, offset))
+
+        print(self.filename)
+        try:
+            try:
+                n_cityObjects = self.extract(other_block)
+            finally:
+                if self.pool is not None:
+                    self.pool.shutdown()
+                    self.pool = None
+                if options.separate_components:
+                    # -- The index of the components is written once
+                    self.index.write()
+
+            if n_cityObjects > 0:
+                merge_block(other_block, self.writers, self.atts, self.triangulations)
+                print("\tExtraction done. Sorting geometry and writing file(s).")
+                if not options.separate_components:
+                    self.write()
+            else:
+                print(
+                    "\tThere is a problem with this file: no cityObjects have been found. Please check if the file complies to CityGML.")
+        finally:
+            # -- Get rid of the temporary files of the writers
+            for writer in self.writers.values():
+                writer.close()
+        return self.written
+
+    def extract(self, other_block):
+        """Converts the buildings and the other city objects of the file. Returns the number of cityObjects."""
+        options = self.options
+        ns = self.ns
+        if self.stream:
+            # -- Convert each cityObjectMember as soon as it is parsed and free it afterwards,
+            # -- so only one cityObject at a time has to be kept in memory
+            print("\tStreaming the cityObjects and extracting the geometry...")
+            n_cityObjects = 0
+            b_counter = 0
+            for cityObject in stream_city_objects(self.source, ns):
+                n_cityObjects += 1
+                self.root = cityObject.getroottree().getroot()
+                for child in cityObject.getchildren():
+                    if child.tag == ns.tag('bldg', 'Building'):
+                        b_counter = self.building_to_obj(child, b_counter)
+                    elif is_other(child, ns):
+                        other_to_block(child, other_block, options, ns)
+            print("\tThere were", n_cityObjects, "cityObject(s) and", b_counter, "building(s) in this CityGML file.")
+        else:
+            # -- Find all instances of cityObjectMember and put them in a list
+            cityObjects = []
+            buildings = []
+            other = []
+            for obj in self.root.getiterator(ns.tag('citygml', 'cityObjectMember')):
+                cityObjects.append(obj)
+            n_cityObjects = len(cityObjects)
+            if n_cityObjects == 0:
+                return 0
+
+            # -- Report the progress and contents of the CityGML file
+            print("\tThere are", len(cityObjects), "cityObject(s) in this CityGML file.")
+            # -- Store each building separately
+            for cityObject in cityObjects:
+                for child in cityObject.getchildren():
+                    if child.tag == ns.tag('bldg', 'Building'):
+                        buildings.append(child)
+
+            for cityObject in cityObjects:
+                for child in cityObject.getchildren():
+                    if is_other(child, ns):
+                        other.append(child)
+
+            print("\tAnalysing objects and extracting the geometry...")
+
+            # -- Count the buildings
+            b_counter = 0
+            b_total = len(buildings)
+            print(" There are ", b_total, " buildings in the dataset")
+
+            # -- Do each building separately
+            for b in buildings:
+                b_counter = self.building_to_obj(b, b_counter, b_total)
+
+            for oth in other:
+                other_to_block(oth, other_block, options, ns)
+
+        if self.pool is not None:
+            # -- Wait for the last batches of buildings
+            self.submit_batch()
+            self.merge_pending(0)
+        return n_cityObjects
+
+    def building_to_obj(self, b, b_counter, b_total=None):
+        """Converts one <bldg:Building> into faces of the OBJ, or into separate components if invoked.
+        Returns the updated building counter."""
+        options = self.options
+        # addd by th_fr
+        if options.separate_components:
+            json_filepath = self.result + "index.json"
+            # todo: mus snoch implementiert werde
+
+            # -- The reference system of the file is the same for all its buildings
+            if not self.crs_added:
+                csm.addCRSToJSON(self.root, json_filepath, self.ns, self.index)
+                self.crs_added = True
+            csm.separateComponents(b, self.result, APPROXIMATEWINDOWS=options.approximate_windows,
+                                   ADDBOUNDINGBOX=options.add_bounding_box,
+                                   ADDBOUNDINGBOXJSON=options.add_bounding_box_json,
+                                   TRANSLATEBUILDINGS=options.translate_buildings,
+                                   IMPORTBOUNDINGBOX=options.import_bounding_box, b_counter=b_counter, ns=self.ns,
+                                   index=self.index, offset=self.ns.objectOffset(b))
+            # End time
+            end_time = time.time()
+            # Calculate elapsed time
+            elapsed_time = end_time - self.start_time
+            print(f"Elapsed time: {elapsed_time:.2f} seconds")
+            return b_counter + 1
+
+        # -- Increment the building counter
+        b_counter += 1
+
+        # -- Print progress for large files every 1000 buildings.
+        if b_counter == 1000:
+            print("\t1000... ", )
+        elif b_total is not None and b_counter % 1000 == 0 and b_counter == (b_total - b_total % 1000):
+            print(str(b_counter) + "...")
+        elif b_counter > 0 and b_counter % 1000 == 0:
+            print(str(b_counter) + "... ", )
+
+        if self.pool is not None:
+            # -- The building is serialized and converted by one of the worker processes
+            self.batch.append((b_counter, etree.tostring(b)))
+            if len(self.batch) >= self.batch_size:
+                self.submit_batch()
+        else:
+            merge_block(building_to_block(b, b_counter, options, self.ns), self.writers, self.atts,
+                        self.triangulations)
+        return b_counter
+
+    def submit_batch(self):
+        """Sends the collected buildings to the pool of worker processes."""
+        if self.batch:
+            self.pending.append(self.pool.submit(convert_batch, self.batch))
+            self.batch = []
+        # -- Keep the workers busy, but do not let the converted buildings pile up
+        self.merge_pending(2 * self.options.workers)
+
+    def merge_pending(self, limit):
+        """Merges the converted batches until at most limit batches are pending.
+        The batches are merged in the order the buildings appear in the file, so the output is the same as
+        without the pool of workers."""
+        while len(self.pending) > limit:
+            for block in self.pending.pop(0).result():
+                merge_block(block, self.writers, self.atts, self.triangulations)
+
+    def write(self):
+        """Writes the OBJ file of each class which has any vertices."""
+        writers = self.writers
+        # -- Translate (convert) the vertices to a local coordinate system
+        origin = None
+        if self.options.translate:
+            print("\tTranslating the coordinates of vertices.")
+            smallest = [writers[cl].smallest for cl in writers if writers[cl].count > 0]
+            if smallest:
+                origin = np.array(min(smallest))
+
+        if self.options.output_format == 'glb':
+            # -- All the classes in one binary glTF, the one of all the surfaces is named after the file
+            classes = [(self.filename if cl == 'All' else cl, writers[cl]) for cl in writers if writers[cl].count > 0]
+            if classes:
+                glbpath = self.result + self.filename + meshwritermodule.GlbWriter.extension
+                meshwritermodule.write_glb(glbpath, classes, origin)
+                self.written.append(glbpath)
+        else:
+            # -- Write the OBJ(s)
+            # -- Theme by theme
+            for cl in writers:
+                if writers[cl].count > 0:
+                    if cl == 'All':
+                        adj_suffix = ""
+                    else:
+                        adj_suffix = "-" + str(cl)
+
+                    objpath = self.result + self.filename + str(adj_suffix) + writers[cl].extension
+                    writers[cl].write(objpath, origin)
+                    self.written.append(objpath)
+
+        print("\t%s file(s) written." % self.options.output_format.upper())
+
+        # -- Report how the polygons were triangulated
+        if self.options.fast_triangulation or self.options.batch_triangulation:
+            print('\tTriangulated polygons:', ', '.join(
+                '%d %s' % (self.triangulations[path], path) for path in triangulationPaths))
+
+        # -- Print the range of attributes. Useful for defining the range of the colorbar.
+        if self.options.attribute:
+            print('\tRange of attributes:', min(self.atts), '--', max(self.atts))
+
+
+def convert_file(fullpath, result, options):
+    """Converts one CityGML file into OBJ file(s) in the result directory. Returns the list of written OBJ files."""
+    return FileConversion(fullpath, result, options).run()
+
+
+# -- Extensions of the CityGML files which are searched for in a directory
+citygmlExtensions = ('*.gml', '*.xml')
+
+
+def find_citygml_files(directory):
+    """CityGML files of a directory."""
+    # Old version: types = ('*.gml', '*.GML', '*.xml', '*.XML')
+    files_found = []
+    for files in citygmlExtensions:
+        files_found.extend(glob.glob(files, root_dir=directory))
+    return [os.path.join(directory, f) for f in files_found]
+
+
+class ConversionResult:
+    """Outcome of convert: the converted CityGML files, the written files and the time it took."""
+
+    def __init__(self, files):
+        self.files = files
+        self.written = []
+        self.elapsed = 0.0
+
+
+def convert(path, options=None, output=None):
+    """Converts a CityGML file, or all the CityGML files of a directory, with the given ConversionOptions.
+    The files are written to the output directory, by default the directory of the CityGML file(s).
+    Returns a ConversionResult. The converter can be called again and again in the same process, and the calls are
+    re-entrant: the state of the conversion of a file (its name space context, version and the index of the separated
+    components) is kept by its FileConversion and passed down, so calls can overlap, e.g. in threads, as long as
+    they write to different output directories.
+    Raises ValueError if the components are separated (separate_components) with several file workers."""
+    start_time = time.time()
+    if options is None:
+        options = ConversionOptions()
+    if options.file_workers > 1 and options.separate_components:
+        # -- The components of all the files are written to the same index in the output directory
+        raise ValueError("The components of several files cannot be separated at the same time (-sepC with -fw).")
+    if os.path.isdir(path):
+        directory = os.path.join(os.path.abspath(path), '')
+        files_found = find_citygml_files(directory)
+    else:
+        directory = os.path.join(os.path.dirname(os.path.abspath(path)), '')
+        files_found = [os.path.abspath(path)]
+    if output is None:
+        output = directory
+    output = os.path.join(output, '')
+    if not os.path.isdir(output):
+        os.makedirs(output)
+    conversion = ConversionResult(files_found)
+
+    if options.file_workers > 1 and len(files_found) > 1:
+        # -- Each file is converted by its own worker process, so its buildings are converted there one by one
+        file_options = copy.copy(options)
+        file_options.workers = 1
+        # -- Start with the largest files, so that a big file does not finish last
+        files_found = sorted(files_found, key=os.path.getsize, reverse=True)
+        with ProcessPoolExecutor(max_workers=options.file_workers) as pool:
+            for written in pool.map(convert_file, files_found, itertools.repeat(output),
+                                    itertools.repeat(file_options)):
+                conversion.written.extend(written)
+    else:
+        for f in files_found:
+            conversion.written.extend(convert_file(f, output, options))
+    conversion.elapsed = time.time() - start_time
+    return conversion
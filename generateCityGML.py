@@ -0,0 +1,274 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# This code is part of the CityGML2OBJs package
+
+# Copyright (c) 2014
+# Filip Biljecki
+# Delft University of Technology
+# fbiljecki@gmail.com
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+# -- Generator of synthetic CityGML 1.0, 2.0 and 3.0 files for testing and benchmarking the converter.
+# -- The buildings are gabled boxes on a grid, with their thematic boundaries. At LoD3 the walls have windows and a
+# -- door as openings, which are cut out of the walls as interior rings. The vertices are written alternately as
+# -- <gml:posList> and as <gml:pos>, and some city furniture with implicit geometry is added.
+# -- The same arguments always give the same file.
+# -- Usage: python generateCityGML.py -o city.gml -n 1000 [-v 2] [-l 3] [-seed 1] [-pos mixed]
+
+import argparse
+import math
+import random
+
+# -- Name spaces of each version, keyed by the prefixes used in the generated files
+namespaces = {
+    1: {'core': "http://www.opengis.net/citygml/1.0", 'gml': "http://www.opengis.net/gml",
+        'bldg': "http://www.opengis.net/citygml/building/1.0", 'frn': "http://www.opengis.net/citygml/cityfurniture/1.0"},
+    2: {'core': "http://www.opengis.net/citygml/2.0", 'gml': "http://www.opengis.net/gml",
+        'bldg': "http://www.opengis.net/citygml/building/2.0", 'frn': "http://www.opengis.net/citygml/cityfurniture/2.0"},
+    3: {'core': "http://www.opengis.net/citygml/3.0", 'gml': "http://www.opengis.net/gml/3.2",
+        'bldg': "http://www.opengis.net/citygml/building/3.0", 'frn': "http://www.opengis.net/citygml/cityfurniture/3.0",
+        'con': "http://www.opengis.net/citygml/construction/3.0"},
+}
+
+# -- Layout of the buildings: origin of the grid, size of its cells and reference system
+origin = (690000.0, 5336000.0, 500.0)
+spacing = 30.0
+srsName = "EPSG:25832"
+
+# -- One city furniture with implicit geometry for this many buildings
+furnitureEvery = 10
+
+
+def coordinates(points):
+    """Coordinates of a list of 3D points as text."""
+    return " ".join("%.3f %.3f %.3f" % tuple(p) for p in points)
+
+
+class Writer:
+    """Writes the elements of one version of CityGML as text, with the chosen way of writing the vertices."""
+
+    def __init__(self, version, positions):
+        self.version = version
+        self.positions = positions
+        # -- Tags of the thematic surfaces and of the openings, and of their geometry, which differ in 3.0
+        if version == 3:
+            self.surface = 'con:%s'
+            self.boundary = 'core:boundary'
+            self.opening = 'con:fillingSurface'
+            self.openingTag = {'Window': 'con:WindowSurface', 'Door': 'con:DoorSurface'}
+            self.lodMultiSurface = 'core:lod%dMultiSurface'
+            self.implicit = 'core:lod2ImplicitRepresentation'
+        else:
+            self.surface = 'bldg:%s'
+            self.boundary = 'bldg:boundedBy'
+            self.opening = 'bldg:opening'
+            self.openingTag = {'Window': 'bldg:Window', 'Door': 'bldg:Door'}
+            self.lodMultiSurface = 'bldg:lod%dMultiSurface'
+            self.implicit = 'frn:lod2ImplicitRepresentation'
+        # -- Whether the vertices of the current building are written as <gml:pos>
+        self.pos = positions == 'pos'
+
+    def ring(self, points):
+        """<gml:LinearRing> of a list of 3D points, the first point is repeated at the end."""
+        points = list(points) + [points[0]]
+        if self.pos:
+            return "<gml:LinearRing>%s</gml:LinearRing>" % "".join(
+                "<gml:pos>%s</gml:pos>" % coordinates([p]) for p in points)
+        return '<gml:LinearRing><gml:posList srsDimension="3">%s</gml:posList></gml:LinearRing>' % coordinates(points)
+
+    def polygon(self, gmlId, exterior, interiors=()):
+        """<gml:Polygon> with its exterior and interior rings."""
+        parts = ['<gml:Polygon gml:id="%s"><gml:exterior>%s</gml:exterior>' % (gmlId, self.ring(exterior))]
+        for interior in interiors:
+            parts.append('<gml:interior>%s</gml:interior>' % self.ring(interior))
+        parts.append('</gml:Polygon>')
+        return "".join(parts)
+
+    def multiSurface(self, polygons):
+        """<gml:MultiSurface> of the given polygons (as text)."""
+        return "<gml:MultiSurface>%s</gml:MultiSurface>" % "".join(
+            "<gml:surfaceMember>%s</gml:surfaceMember>" % p for p in polygons)
+
+    def envelope(self, lower, upper):
+        """<gml:boundedBy> with the <gml:Envelope> of the given corners."""
+        return ('<gml:boundedBy><gml:Envelope srsName="%s" srsDimension="3"><gml:lowerCorner>%s</gml:lowerCorner>'
+                '<gml:upperCorner>%s</gml:upperCorner></gml:Envelope></gml:boundedBy>'
+                % (srsName, coordinates([lower]), coordinates([upper])))
+
+
+def wallPoint(start, end, offset, z):
+    """Point of a vertical wall from start to end (2D), at the given distance from start and height."""
+    length = math.hypot(end[0] - start[0], end[1] - start[1])
+    return (start[0] + (end[0] - start[0]) * offset / length, start[1] + (end[1] - start[1]) * offset / length, z)
+
+
+def rectangle(start, end, left, right, bottom, top):
+    """Rectangle in a wall from start to end, facing the same way as the wall."""
+    return [wallPoint(start, end, left, bottom), wallPoint(start, end, right, bottom),
+            wallPoint(start, end, right, top), wallPoint(start, end, left, top)]
+
+
+def building(writer, k, rng, lod):
+    """<cityObjectMember> with the k-th building, returns its text and its number of polygons."""
+    cols = writer.cols
+    x0 = origin[0] + (k % cols) * spacing + rng.uniform(0.0, 2.0)
+    y0 = origin[1] + (k // cols) * spacing + rng.uniform(0.0, 2.0)
+    z0 = origin[2] + rng.uniform(0.0, 1.0)
+    x1 = x0 + rng.uniform(8.0, 20.0)
+    y1 = y0 + rng.uniform(8.0, 15.0)
+    z1 = z0 + rng.uniform(6.0, 15.0)
+    z2 = z1 + rng.uniform(2.0, 5.0)
+    ym = (y0 + y1) / 2.0
+    bid = "B%d" % k
+    writer.pos = writer.positions == 'pos' or (writer.positions == 'mixed' and k % 2 == 1)
+
+    # -- Walls as (name, start, end, outline), the outline is counter-clockwise seen from the outside
+    front = ((x0, y0), (x1, y0))
+    back = ((x1, y1), (x0, y1))
+    walls = [
+        ('front', front, [(x0, y0, z0), (x1, y0, z0), (x1, y0, z1), (x0, y0, z1)]),
+        ('right', ((x1, y0), (x1, y1)), [(x1, y0, z0), (x1, y1, z0), (x1, y1, z1), (x1, ym, z2), (x1, y0, z1)]),
+        ('back', back, [(x1, y1, z0), (x0, y1, z0), (x0, y1, z1), (x1, y1, z1)]),
+        ('left', ((x0, y1), (x0, y0)), [(x0, y1, z0), (x0, y0, z0), (x0, y0, z1), (x0, ym, z2), (x0, y1, z1)]),
+    ]
+    surfaces = [
+        ('GroundSurface', 'ground', [(x0, y0, z0), (x0, y1, z0), (x1, y1, z0), (x1, y0, z0)], [], []),
+        ('RoofSurface', 'roof_front', [(x0, y0, z1), (x1, y0, z1), (x1, ym, z2), (x0, ym, z2)], [], []),
+        ('RoofSurface', 'roof_back', [(x1, y1, z1), (x0, y1, z1), (x0, ym, z2), (x1, ym, z2)], [], []),
+    ]
+    for name, (start, end), outline in walls:
+        openings = []
+        if lod == 3 and name in ('front', 'back'):
+            # -- A row of windows in the upper half of the wall, and a door in the middle of the front wall
+            width = math.hypot(end[0] - start[0], end[1] - start[1])
+            count = max(int((width - 2.0) / 3.0), 1)
+            for w in range(count):
+                centre = width * (w + 1) / (count + 1)
+                openings.append(('Window', rectangle(start, end, centre - 0.6, centre + 0.6, z0 + 3.3, z0 + 4.7)))
+            if name == 'front':
+                openings.append(('Door', rectangle(start, end, width / 2.0 - 0.5, width / 2.0 + 0.5,
+                                                   z0 + 0.1, z0 + 2.2)))
+        surfaces.append(('WallSurface', 'wall_' + name, outline, [o[1][::-1] for o in openings], openings))
+
+    parts = ['<core:cityObjectMember><bldg:Building gml:id="%s">' % bid]
+    parts.append(writer.envelope((x0, y0, z0), (x1, y1, z2)))
+    polygons = 0
+    for cl, name, exterior, interiors, openings in surfaces:
+        sid = "%s_%s" % (bid, name)
+        surface = writer.surface % cl
+        parts.append('<%s><%s gml:id="%s">' % (writer.boundary, surface, sid))
+        parts.append('<%s>%s</%s>' % (writer.lodMultiSurface % lod,
+                                       writer.multiSurface([writer.polygon(sid + "_p", exterior, interiors)]),
+                                       writer.lodMultiSurface % lod))
+        polygons += 1
+        for o, (kind, outline) in enumerate(openings):
+            oid = "%s_%s%d" % (sid, kind, o)
+            tag = writer.openingTag[kind]
+            parts.append('<%s><%s gml:id="%s"><%s>%s</%s></%s></%s>' % (
+                writer.opening, tag, oid, writer.lodMultiSurface % lod,
+                writer.multiSurface([writer.polygon(oid + "_p", outline)]), writer.lodMultiSurface % lod, tag,
+                writer.opening))
+            polygons += 1
+        parts.append('</%s></%s>' % (surface, writer.boundary))
+    parts.append('</bldg:Building></core:cityObjectMember>\n')
+    return "".join(parts), polygons
+
+
+def furniture(writer, k):
+    """<cityObjectMember> with a bench (a box) as implicit geometry next to the k-th building, and its polygons."""
+    cols = writer.cols
+    x = origin[0] + (k % cols) * spacing + spacing - 4.0
+    y = origin[1] + (k // cols) * spacing + 2.0
+    # -- The prototype is in its own coordinates, it is placed by the reference point
+    lx, ly, lz = 2.0, 0.5, 0.5
+    box = [
+        [(0, 0, 0), (0, ly, 0), (lx, ly, 0), (lx, 0, 0)],
+        [(0, 0, lz), (lx, 0, lz), (lx, ly, lz), (0, ly, lz)],
+        [(0, 0, 0), (lx, 0, 0), (lx, 0, lz), (0, 0, lz)],
+        [(lx, 0, 0), (lx, ly, 0), (lx, ly, lz), (lx, 0, lz)],
+        [(lx, ly, 0), (0, ly, 0), (0, ly, lz), (lx, ly, lz)],
+        [(0, ly, 0), (0, 0, 0), (0, 0, lz), (0, ly, lz)],
+    ]
+    fid = "F%d" % k
+    polygons = [writer.polygon("%s_p%d" % (fid, n), face) for n, face in enumerate(box)]
+    text = ('<core:cityObjectMember><frn:CityFurniture gml:id="%s"><%s><core:ImplicitGeometry>'
+            '<core:transformationMatrix>1 0 0 0 0 1 0 0 0 0 1 0 0 0 0 1</core:transformationMatrix>'
+            '<core:relativeGMLGeometry>%s</core:relativeGMLGeometry>'
+            '<core:referencePoint><gml:Point><gml:pos srsDimension="3">%s</gml:pos></gml:Point></core:referencePoint>'
+            '</core:ImplicitGeometry></%s></frn:CityFurniture></core:cityObjectMember>\n'
+            % (fid, writer.implicit, writer.multiSurface(polygons), coordinates([(x, y, origin[2])]),
+               writer.implicit))
+    return text, len(box)
+
+
+def generate(path, buildings, version=2, lod=3, seed=1, positions='mixed'):
+    """Writes a synthetic CityGML file with the given number of buildings.
+    version is 1, 2 or 3, lod is 2 or 3, positions is 'posList', 'pos' or 'mixed' (alternating by building).
+    Returns a dict with the number of buildings, city objects and polygons of the file."""
+    rng = random.Random(seed)
+    writer = Writer(version, positions)
+    writer.cols = max(int(math.ceil(math.sqrt(buildings))), 1)
+    rows = max(int(math.ceil(buildings / float(writer.cols))), 1)
+    ns = namespaces[version]
+    stats = {'buildings': buildings, 'cityObjects': 0, 'polygons': 0}
+    with open(path, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<core:CityModel %s>\n' % " ".join('xmlns:%s="%s"' % item for item in ns.items()))
+        # -- The envelope of the model covers the cells of the grid
+        f.write(writer.envelope(origin, (origin[0] + writer.cols * spacing, origin[1] + rows * spacing,
+                                         origin[2] + 21.0)) + "\n")
+        for k in range(buildings):
+            text, polygons = building(writer, k, rng, lod)
+            f.write(text)
+            stats['cityObjects'] += 1
+            stats['polygons'] += polygons
+            if k % furnitureEvery == furnitureEvery - 1:
+                text, polygons = furniture(writer, k)
+                f.write(text)
+                stats['cityObjects'] += 1
+                stats['polygons'] += polygons
+        f.write('</core:CityModel>\n')
+    return stats
+
+
+if __name__ == '__main__':
+    PARSER = argparse.ArgumentParser(description='Generate a synthetic CityGML file.')
+    PARSER.add_argument('-o', '--output', help='Path of the CityGML file to write.', required=True)
+    PARSER.add_argument('-n', '--buildings', help='Number of buildings. 100 is default.', required=False)
+    PARSER.add_argument('-v', '--version', help='Version of CityGML: 1, 2 or 3. 2 is default.', required=False)
+    PARSER.add_argument('-l', '--lod', help='Level of detail: 2, or 3 with openings. 3 is default.', required=False)
+    PARSER.add_argument('-seed', '--seed', help='Seed of the dimensions of the buildings. 1 is default.',
+                        required=False)
+    PARSER.add_argument('-pos', '--positions',
+                        help='Write the vertices as posList, pos, or mixed (alternating by building). mixed is default.',
+                        required=False)
+    ARGS = vars(PARSER.parse_args())
+    BUILDINGS = int(ARGS['buildings']) if ARGS['buildings'] is not None else 100
+    VERSION = int(ARGS['version']) if ARGS['version'] in ('1', '2', '3') else 2
+    LOD = 2 if ARGS['lod'] == '2' else 3
+    SEED = int(ARGS['seed']) if ARGS['seed'] is not None else 1
+    POSITIONS = ARGS['positions'] if ARGS['positions'] in ('posList', 'pos', 'mixed') else 'mixed'
+
+    stats = generate(ARGS['output'], BUILDINGS, VERSION, LOD, SEED, POSITIONS)
+    print("CityGML %d.0, LoD%d: %d buildings, %d city objects, %d polygons written to %s"
+          % (VERSION, LOD, stats['buildings'], stats['cityObjects'], stats['polygons'], ARGS['output']))
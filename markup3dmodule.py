@@ -1,6 +1,5 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
-import config
 # The MIT License (MIT)
 
 # This code is part of the CityGML2OBJs package
@@ -28,121 +27,230 @@ import config
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
-from config import setVersion
-def specifyVersion():
-    global ns_citygml
-    global ns_gml
-    global ns_bldg
-    global ns_xsi
-    global ns_xAL
-    global ns_xlink
-    global ns_dem
-    global ns_con
-    global ns_app
-    global ns_pcl
-    global ns_gen
-    global ns_gss
-    global ns_pfx0
-    global ns_gsr
-    global ns_tran
-    global ns_gmd
-    global ns_gts
-    global ns_veg
-    global ns_frn
-    global ns_tun
-    global ns_wtr
-    global nsmap
-
-    #print("config.getVerision", config.getVersion())
-    if config.getVersion() == 2 or config.getVersion() == 1:
-        # -- Name spaces for CityGML 2.0
-        ns_citygml = "http://www.opengis.net/citygml/2.0"
-        ns_gml = "http://www.opengis.net/gml"
-        ns_bldg = "http://www.opengis.net/citygml/building/2.0"
-        ns_xsi = "http://www.w3.org/2001/XMLSchema-instance"
-        ns_xAL = "urn:oasis:names:tc:ciq:xsdschema:xAL:2.0"
-        ns_xlink = "http://www.w3.org/1999/xlink"
-        ns_dem = "http://www.opengis.net/citygml/relief/2.0"
-    elif config.getVersion() == 3:
-        # -- Name spaces for CityGML 3.0
-        ns_citygml = "http://www.opengis.net/citygml/3.0"
-        ns_con = "http://www.opengis.net/citygml/construction/3.0"
-        ns_xlink = "http://www.w3.org/1999/xlink"
-        ns_gml = "http://www.opengis.net/gml/3.2"
-        ns_bldg = "http://www.opengis.net/citygml/building/3.0"
-        ns_app = "http://www.opengis.net/citygml/appearance/3.0"
-        ns_pcl = "http://www.opengis.net/citygml/pointcloud/3.0"
-        ns_gen = "http://www.opengis.net/citygml/generics/3.0"
-        ns_gss = "http://www.isotc211.org/2005/gss"
-        ns_pfx0 = "urn:oasis:names:tc:ciq:xsdschema:xAL:2.0"
-        ns_gsr = "http://www.isotc211.org/2005/gsr"
-        ns_xsi = "http://www.w3.org/2001/XMLSchema-instance"
-        ns_tran = "http://www.opengis.net/citygml/transportation/3.0"
-        ns_gmd = "http://www.isotc211.org/2005/gmd"
-        ns_gts = "http://www.isotc211.org/2005/gts"
-        ns_veg = "http://www.opengis.net/citygml/vegetation/3.0"
-        ns_xAL = "urn:oasis:names:tc:ciq:xal:3"
-        ns_dem = "http://www.opengis.net/citygml/relief/3.0"
-        ns_frn = "http://www.opengis.net/citygml/cityfurniture/3.0"
-        ns_tun = "http://www.opengis.net/citygml/tunnel/3.0"
-        ns_wtr = "http://www.opengis.net/citygml/waterbody/3.0"
-
-    nsmap = {
-        None: ns_citygml,
-        'gml': ns_gml,
-        'bldg': ns_bldg,
-        'xsi': ns_xsi,
-        'xAL': ns_xAL,
-        'xlink': ns_xlink,
-        'dem': ns_dem
-    }
-
-
-def polydecomposer(polygon):
-    """Extracts the <gml:exterior> and <gml:interior> of a <gml:Polygon>."""
-    specifyVersion()
-    exter = polygon.findall('.//{%s}exterior' % ns_gml)
-    inter = polygon.findall('.//{%s}interior' % ns_gml)
+import numpy as np
+from lxml import etree
+
+
+# -- Name spaces of each version of CityGML, keyed by their prefix
+citygmlNamespaces = {
+    1: {
+        'citygml': "http://www.opengis.net/citygml/1.0",
+        'gml': "http://www.opengis.net/gml",
+        'bldg': "http://www.opengis.net/citygml/building/1.0",
+        'tran': "http://www.opengis.net/citygml/transportation/1.0",
+        'veg': "http://www.opengis.net/citygml/vegetation/1.0",
+        'gen': "http://www.opengis.net/citygml/generics/1.0",
+        'dem': "http://www.opengis.net/citygml/relief/1.0",
+        'frn': "http://www.opengis.net/citygml/cityfurniture/1.0",
+        'tun': "http://www.opengis.net/citygml/tunnel/1.0",
+        'wtr': "http://www.opengis.net/citygml/waterbody/1.0",
+        'brid': "http://www.opengis.net/citygml/bridge/1.0",
+    },
+    2: {
+        'citygml': "http://www.opengis.net/citygml/2.0",
+        'gml': "http://www.opengis.net/gml",
+        'bldg': "http://www.opengis.net/citygml/building/2.0",
+        'tran': "http://www.opengis.net/citygml/transportation/2.0",
+        'veg': "http://www.opengis.net/citygml/vegetation/2.0",
+        'gen': "http://www.opengis.net/citygml/generics/2.0",
+        'dem': "http://www.opengis.net/citygml/relief/2.0",
+        'frn': "http://www.opengis.net/citygml/cityfurniture/2.0",
+        'tun': "http://www.opengis.net/citygml/tunnel/2.0",
+        'wtr': "http://www.opengis.net/citygml/waterbody/2.0",
+        'brid': "http://www.opengis.net/citygml/bridge/2.0",
+    },
+    3: {
+        'citygml': "http://www.opengis.net/citygml/3.0",
+        'gml': "http://www.opengis.net/gml/3.2",
+        'bldg': "http://www.opengis.net/citygml/building/3.0",
+        'tran': "http://www.opengis.net/citygml/transportation/3.0",
+        'veg': "http://www.opengis.net/citygml/vegetation/3.0",
+        'gen': "http://www.opengis.net/citygml/generics/3.0",
+        'dem': "http://www.opengis.net/citygml/relief/3.0",
+        'frn': "http://www.opengis.net/citygml/cityfurniture/3.0",
+        'tun': "http://www.opengis.net/citygml/tunnel/3.0",
+        'wtr': "http://www.opengis.net/citygml/waterbody/3.0",
+        'brid': "http://www.opengis.net/citygml/bridge/3.0",
+        'con': "http://www.opengis.net/citygml/construction/3.0",
+    },
+}
+
+# -- In CityGML 3.0 the thematic surfaces of buildings and their openings are in the construction module (the closure
+# -- surface in the core module), and an opening is a filling surface of its thematic surface. The other elements of
+# -- buildings are in the name space of buildings in every version, see Namespaces.semanticTag
+semanticTags3 = {
+    'GroundSurface': ('con', 'GroundSurface'),
+    'WallSurface': ('con', 'WallSurface'),
+    'RoofSurface': ('con', 'RoofSurface'),
+    'ClosureSurface': ('citygml', 'ClosureSurface'),
+    'CeilingSurface': ('con', 'CeilingSurface'),
+    'InteriorWallSurface': ('con', 'InteriorWallSurface'),
+    'FloorSurface': ('con', 'FloorSurface'),
+    'OuterCeilingSurface': ('con', 'OuterCeilingSurface'),
+    'OuterFloorSurface': ('con', 'OuterFloorSurface'),
+    'opening': ('con', 'fillingSurface'),
+    'Window': ('con', 'WindowSurface'),
+    'Door': ('con', 'DoorSurface'),
+}
+
+
+class Namespaces(dict):
+    """Name spaces of a CityGML file keyed by their prefix, as a dict, with the qualified tags and the compiled
+    ETXPath/XPath expressions used for every polygon and ring. Created once per file and passed to the functions
+    reading its elements, so the files of several conversions can be read at the same time."""
+
+    def __init__(self, version):
+        dict.__init__(self, citygmlNamespaces[version])
+        self.version = version
+        gml = self['gml']
+        # -- Qualified tags, formatted once
+        self.tags = {}
+        self.tagSets = {}
+        self.Polygon = self.tag('gml', 'Polygon')
+        # -- Compiled expressions
+        self.polygons = etree.ETXPath('.//{%s}Polygon' % gml)
+        self.exteriors = etree.ETXPath('.//{%s}exterior' % gml)
+        self.interiors = etree.ETXPath('.//{%s}interior' % gml)
+        self.posLists = etree.ETXPath('.//{%s}posList' % gml)
+        self.positions = etree.ETXPath('.//{%s}pos' % gml)
+        self.gmlId = etree.XPath('@g:id', namespaces={'g': gml})
+        # -- Offset of the coordinates of the file (translation into a local CRS with -tCo), passed to GMLpointsArray
+        self.offset = None
+        self.ImplicitGeometry = './/' + self.tag('citygml', 'ImplicitGeometry')
+        # -- Tags of the windows and doors of the openings
+        self.Window = self.semanticTag('Window')
+        self.Door = self.semanticTag('Door')
+        self.openingTags = frozenset((self.Window, self.Door))
+
+    def tag(self, prefix, name):
+        """Qualified tag of an element, e.g. tag('bldg', 'Building') is '{<building name space>}Building'."""
+        key = (prefix, name)
+        if key not in self.tags:
+            self.tags[key] = '{%s}%s' % (self[prefix], name)
+        return self.tags[key]
+
+    def semanticTag(self, name):
+        """Qualified tag of a thematic surface, an opening or another element of a building by its name in
+        CityGML 2.0, e.g. semanticTag('Window') is the tag of bldg:Window, or of con:WindowSurface in 3.0."""
+        if self.version == 3 and name in semanticTags3:
+            return self.tag(*semanticTags3[name])
+        return self.tag('bldg', name)
+
+    def objectOffset(self, cityObject):
+        """Offset of the coordinates of one city object. As with the translation of the document
+        (CityGMLTranslation.translateCityObjectMember), an object with an implicit geometry keeps its coordinates,
+        since they are relative to its reference point."""
+        if self.offset is None or cityObject.find(self.ImplicitGeometry) is not None:
+            return None
+        return self.offset
+
+    def tagSet(self, *names):
+        """Set of the qualified tags of the given (prefix, name) pairs, to test the tag of an element against."""
+        if names not in self.tagSets:
+            self.tagSets[names] = frozenset(self.tag(prefix, name) for prefix, name in names)
+        return self.tagSets[names]
+
+
+def polydecomposer(polygon, ns):
+    """Extracts the <gml:exterior> and <gml:interior> of a <gml:Polygon>, in the name spaces ns of its file."""
+    exter = ns.exteriors(polygon)
+    inter = ns.interiors(polygon)
     return exter, inter
 
 
-def polygonFinder(GMLelement):
+def polygonFinder(GMLelement, ns):
     """Find the <gml:polygon> element."""
-    specifyVersion()
-    #print("NSgml:", ns_gml)
-    polygonsLocal = GMLelement.findall('.//{%s}Polygon' % ns_gml)
+    polygonsLocal = ns.polygons(GMLelement)
     #print(polygonsLocal)
 
     #for polygon in polygonsLocal:
-    #    gml_id = polygon.get('{%s}id' % ns_gml)
+    #    gml_id = polygon.get('{%s}id' % ns['gml'])
     #    print(gml_id)
     return polygonsLocal
 
 
-def GMLpoints(ring):
-    specifyVersion()
-    "Extract points from a <gml:LinearRing>."
-    # -- List containing points
-    listPoints = []
-    # -- Read the <gml:posList> value and convert to string
-    if len(ring.findall('.//{%s}posList' % ns_gml)) > 0:
-        points = ring.findall('.//{%s}posList' % ns_gml)[0].text
-        # -- List of coordinates
-        coords = points.split()
-        assert (len(coords) % 3 == 0)
-        # -- Store the coordinate tuple
-        for i in range(0, len(coords), 3):
-            listPoints.append([float(coords[i]), float(coords[i + 1]), float(coords[i + 2])])
-    elif len(ring.findall('.//{%s}pos' % ns_gml)) > 0:
-        points = ring.findall('.//{%s}pos' % ns_gml)
-        # -- Extract each point separately
-        for p in points:
+def classifyBuilding(b, ns, tags):
+    """Buckets the elements of a building by their tag in one walk of its subtree.
+    tags are the names to look for (see Namespaces.semanticTag), such as the thematic boundaries
+    and the openings. Returns a dict with, for each of them, a list of (element, polygons) pairs in document
+    order, where polygons are the <gml:Polygon> elements of the hierarchy of the element, as with polygonFinder."""
+    classes = {}
+    for tag in tags:
+        classes[ns.semanticTag(tag)] = tag
+    polygonTag = ns.Polygon
+    buckets = {}
+    for tag in tags:
+        buckets[tag] = []
+    # -- Polygon lists of the elements which are open at the current point of the walk
+    stack = []
+    for event, element in etree.iterwalk(b, events=('start', 'end'), tag=list(classes) + [polygonTag]):
+        if element.tag == polygonTag:
+            if event == 'start':
+                for polygons in stack:
+                    polygons.append(element)
+        elif event == 'start':
+            polygons = []
+            buckets[classes[element.tag]].append((element, polygons))
+            stack.append(polygons)
+        else:
+            stack.pop()
+    return buckets
+
+
+class BuildingContext:
+    """The classified elements of one building, with the data of its openings.
+    The polygons of the openings are kept in a set, so telling whether a polygon of a thematic boundary
+    belongs to an opening is a constant-time lookup (lxml elements hash by identity)."""
+
+    def __init__(self, b, ns, tags):
+        self.building = b
+        self.buckets = classifyBuilding(b, ns, ['opening'] + list(tags))
+        # -- (opening, polygons) pairs
+        self.openings = self.buckets['opening']
+        self.openingPolygons = set()
+        for o, polys in self.openings:
+            self.openingPolygons.update(polys)
+
+    def features(self, tag):
+        """(element, polygons) pairs of the given class."""
+        return self.buckets[tag]
+
+    def isOpening(self, polygon):
+        """Whether the polygon belongs to an opening of the building."""
+        return polygon in self.openingPolygons
+
+
+def GMLpointsArray(ring, ns, offset=None):
+    """Extract points from a <gml:LinearRing> as an (N, 3) array of float64.
+    The coordinates of a <gml:posList>, or of a sequence of <gml:pos>, are parsed in one go.
+    offset is added to every point if it is given, such as the translation into a local CRS (see Namespaces.offset)."""
+    # -- Read the <gml:posList> value
+    posList = ns.posLists(ring)
+    if posList:
+        points = posList[0].text.split()
+        assert (len(points) % 3 == 0)
+    else:
+        # -- Join the <gml:pos> values and parse them together, each of them has whole points
+        pos = ns.positions(ring)
+        if len(pos) == 0:
+            return None
+        points = []
+        for p in pos:
             coords = p.text.split()
             assert (len(coords) % 3 == 0)
-            # -- Store the coordinate tuple
-            for i in range(0, len(coords), 3):
-                listPoints.append([float(coords[i]), float(coords[i + 1]), float(coords[i + 2])])
-    else:
-        return None
+            points.extend(coords)
+    coords = np.array(points, dtype=np.float64)
+    coords = coords.reshape(-1, 3)
+    if offset is not None:
+        coords += offset
+    return coords
+
 
-    return listPoints
+def GMLpoints(ring, ns):
+    "Extract points from a <gml:LinearRing>."
+    # -- List containing points
+    listPoints = GMLpointsArray(ring, ns)
+    if listPoints is None:
+        return None
+    # -- Store the coordinate tuples as lists of floats
+    return listPoints.tolist()
@@ -0,0 +1,332 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+
+# This code is part of the CityGML2OBJs package
+
+# Copyright (c) 2014
+# Filip Biljecki
+# Delft University of Technology
+# fbiljecki@gmail.com
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+# -- Writers of binary meshes (binary glTF and binary PLY), alternatives to the OBJ writer of conversionmodule.
+# -- They take the same blocks of faces and vertices, and write them as typed NumPy buffers: all the classes into
+# -- one binary glTF with a node for each class, or one binary PLY for each class as with OBJ.
+
+import json
+import os
+import struct
+import tempfile
+import numpy as np
+
+
+def material_colours(names, directory, res):
+    """RGB colour of each material of the colormap (see generateMTL.py).
+    They are read from the colormap.mtl in the directory if there is one, otherwise they are taken from the
+    same Matplotlib colormap."""
+    colours = {}
+    mtlpath = os.path.join(directory, "colormap.mtl")
+    if os.path.exists(mtlpath):
+        with open(mtlpath) as mtl_file:
+            name = None
+            for line in mtl_file:
+                values = line.split()
+                if len(values) == 2 and values[0] == 'newmtl':
+                    name = values[1]
+                elif len(values) == 4 and values[0] == 'Kd' and name is not None:
+                    colours[float(name)] = [float(v) for v in values[1:]]
+    missing = [name for name in names if float(name) not in colours]
+    if missing:
+        import matplotlib
+        colormap = matplotlib.colormaps["afmhot"].resampled(res)
+        for name in missing:
+            colours[float(name)] = list(colormap(int(round(float(name) * (res - 1))))[:3])
+    return [colours[float(name)] for name in names]
+
+
+class MeshWriter:
+    """Base of the writers of binary meshes of one class.
+    The vertices of the merged blocks are kept as doubles in a temporary file, as in the OBJ writer. The faces are
+    kept as arrays of zero-based indices, with the object ('o' lines, -g) and the material ('usemtl' lines, -a)
+    of each face as an index to the list of names (-1 if there is none)."""
+
+    extension = None
+
+    def __init__(self, head, directory=None, translate=False, res=101):
+        self.head = head
+        self.directory = directory
+        self.translate = translate
+        self.res = res
+        # -- Number of vertices written so far
+        self.count = 0
+        # -- Smallest vertex (see polygon3dmodule.smallestPoint)
+        self.smallest = None
+        self.vertices = tempfile.TemporaryFile(mode='w+b', dir=directory)
+        self.indices = []
+        self.sizes = []
+        self.objects = []
+        self.materials = []
+        self.object_names = []
+        self.material_names = []
+        self.object_index = {}
+        self.material_index = {}
+        # -- Current object and material, they carry on from one block to the next as in the OBJ
+        self.object = -1
+        self.material = -1
+
+    def add_block(self, faces, vertices):
+        """Adds the faces and the vertices of a block. The local indices of the faces are shifted by
+        the number of vertices added so far."""
+        indices = []
+        sizes = []
+        objects = []
+        materials = []
+        for line in faces:
+            if isinstance(line, str):
+                if line.startswith('o '):
+                    name = line[2:].strip()
+                    if name not in self.object_index:
+                        self.object_index[name] = len(self.object_names)
+                        self.object_names.append(name)
+                    self.object = self.object_index[name]
+                elif line.startswith('usemtl '):
+                    name = line[7:].strip()
+                    if name not in self.material_index:
+                        self.material_index[name] = len(self.material_names)
+                        self.material_names.append(name)
+                    self.material = self.material_index[name]
+            else:
+                indices.extend(line)
+                sizes.append(len(line))
+                objects.append(self.object)
+                materials.append(self.material)
+        if sizes:
+            # -- One-based local indices to zero-based indices of the dataset
+            self.indices.append(np.array(indices, dtype=np.int64) - 1 + self.count)
+            self.sizes.append(np.array(sizes, dtype=np.int64))
+            self.objects.append(np.array(objects, dtype=np.int64))
+            self.materials.append(np.array(materials, dtype=np.int64))
+        if len(vertices) == 0:
+            return
+        smallest = tuple(min(vertices, key=lambda x: (x[0], x[1], x[2])))
+        if self.smallest is None or smallest < self.smallest:
+            self.smallest = smallest
+        self.vertices.write(np.array(list(vertices), dtype=np.float64).tobytes())
+        self.count += len(vertices)
+
+    def read(self):
+        """Returns the vertices and the faces (indices, sizes, objects, materials) added so far."""
+        self.vertices.seek(0)
+        vertices = np.frombuffer(self.vertices.read(), dtype=np.float64).reshape(-1, 3)
+        if self.sizes:
+            return vertices, np.concatenate(self.indices), np.concatenate(self.sizes), \
+                   np.concatenate(self.objects), np.concatenate(self.materials)
+        empty = np.zeros(0, dtype=np.int64)
+        return vertices, empty, empty, empty, empty
+
+    def colours(self):
+        """Colour of each material."""
+        if not self.material_names:
+            return []
+        return material_colours(self.material_names, self.directory, self.res)
+
+    def close(self):
+        self.vertices.close()
+
+
+class GlbWriter(MeshWriter):
+    """Writer of the triangles of one class into a binary glTF (GLB), in which all the classes are written together
+    (see write_glb). glTF has no polygons, so the polygons are triangulated as without -p
+    (see conversionmodule.ConversionOptions.for_conversion).
+    The class is a node with one mesh for each object (one for the whole class without -g), with one primitive for
+    each material. The positions are single-precision, so they are stored relative to the smallest vertex of the
+    class, which becomes the translation of its node (unless the coordinates are translated anyway with -t)."""
+
+    extension = ".glb"
+
+    def add_to(self, gltf, add_view, name, origin=None):
+        """Adds the class to the glTF as a node with the given name. add_view appends data to the binary buffer
+        and returns the index of its buffer view."""
+        vertices, indices, sizes, objects, materials = self.read()
+        if (sizes != 3).any():
+            raise ValueError("A binary glTF is made of triangles, the faces of %s are polygons." % name)
+        triangles = indices.reshape(-1, 3)
+        if origin is not None:
+            # -- Translated coordinates (-t)
+            offset = np.array(origin, dtype=np.float64)
+            translation = [0.0, 0.0, 0.0]
+        else:
+            offset = np.array(self.smallest, dtype=np.float64)
+            translation = offset.tolist()
+        positions = (vertices - offset).astype(np.float32)
+
+        # -- All the primitives of the class share its positions
+        gltf['accessors'].append({'bufferView': add_view(positions.tobytes(), 34962), 'componentType': 5126,
+                                  'count': len(positions), 'type': 'VEC3',
+                                  'min': positions.min(axis=0).tolist() if len(positions) else [0.0] * 3,
+                                  'max': positions.max(axis=0).tolist() if len(positions) else [0.0] * 3})
+        position = len(gltf['accessors']) - 1
+        node = {'name': name, 'translation': translation, 'children': []}
+        gltf['nodes'].append(node)
+        gltf['nodes'][0]['children'].append(len(gltf['nodes']) - 1)
+
+        # -- The materials are shared by the classes, by their name
+        shared = [m['name'] for m in gltf['materials']]
+        material_index = []
+        for material, colour in zip(self.material_names, self.colours()):
+            if material not in shared:
+                shared.append(material)
+                gltf['materials'].append({'name': material, 'pbrMetallicRoughness': {
+                    'baseColorFactor': colour + [1.0], 'metallicFactor': 0.0, 'roughnessFactor': 1.0}})
+            material_index.append(shared.index(material))
+
+        # -- Group the triangles by object, in the order the objects appear, and by material within an object
+        order = np.lexsort((materials, objects))
+        triangles = triangles[order]
+        objects = objects[order]
+        materials = materials[order]
+        groups = np.flatnonzero(np.diff(objects * (len(self.material_names) + 1) + materials)) + 1
+        bounds = np.concatenate(([0], groups, [len(triangles)])).astype(np.int64)
+        mesh = None
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            if start == end:
+                continue
+            if mesh is None or objects[start] != current_object:
+                current_object = objects[start]
+                if current_object >= 0:
+                    mesh_name = self.object_names[current_object]
+                else:
+                    mesh_name = name
+                mesh = {'name': mesh_name, 'primitives': []}
+                gltf['meshes'].append(mesh)
+                gltf['nodes'].append({'name': mesh_name, 'mesh': len(gltf['meshes']) - 1})
+                node['children'].append(len(gltf['nodes']) - 1)
+            data = triangles[start:end].astype(np.uint32)
+            gltf['accessors'].append({'bufferView': add_view(data.tobytes(), 34963), 'componentType': 5125,
+                                      'count': data.size, 'type': 'SCALAR'})
+            primitive = {'attributes': {'POSITION': position}, 'indices': len(gltf['accessors']) - 1, 'mode': 4}
+            if materials[start] >= 0:
+                primitive['material'] = material_index[materials[start]]
+            mesh['primitives'].append(primitive)
+
+
+def write_glb(path, classes, origin=None):
+    """Writes the classes, given as (name, GlbWriter) pairs, into one binary glTF with a node for each class.
+    CityGML is z-up and glTF is y-up, so the root node rotates the model."""
+    gltf = {'asset': {'version': '2.0', 'generator': 'CityGML2OBJs'},
+            'scene': 0, 'scenes': [{'nodes': [0]}],
+            'nodes': [{'name': 'CityGML', 'rotation': [-0.7071067811865476, 0.0, 0.0, 0.7071067811865476],
+                       'children': []}],
+            'meshes': [], 'materials': [], 'accessors': [], 'bufferViews': [], 'buffers': []}
+    chunks = []
+    length = 0
+
+    def add_view(data, target):
+        nonlocal length
+        gltf['bufferViews'].append({'buffer': 0, 'byteOffset': length, 'byteLength': len(data), 'target': target})
+        chunks.append(data)
+        length += len(data)
+        # -- Keep the views aligned to 4 bytes
+        if length % 4:
+            chunks.append(b'\x00' * (4 - length % 4))
+            length += 4 - length % 4
+        return len(gltf['bufferViews']) - 1
+
+    for name, writer in classes:
+        writer.add_to(gltf, add_view, name, origin)
+    if not gltf['materials']:
+        del gltf['materials']
+    gltf['buffers'].append({'byteLength': length})
+
+    content = json.dumps(gltf, separators=(',', ':')).encode('utf-8')
+    content += b' ' * ((4 - len(content) % 4) % 4)
+    binary = b''.join(chunks)
+    with open(path, "wb") as glb_file:
+        glb_file.write(struct.pack('<III', 0x46546C67, 2, 12 + 8 + len(content) + 8 + len(binary)))
+        glb_file.write(struct.pack('<II', len(content), 0x4E4F534A))
+        glb_file.write(content)
+        glb_file.write(struct.pack('<II', len(binary), 0x004E4942))
+        glb_file.write(binary)
+
+
+class PlyWriter(MeshWriter):
+    """Writer of a binary (little endian) PLY of one class.
+    The coordinates are kept in double precision and the faces as they are (triangles, or polygons with -p).
+    With -g each face has the index of its object, and with -a the colour of its material; the names of the
+    objects and materials are listed in the comments of the header."""
+
+    extension = ".ply"
+
+    def write(self, path, origin=None):
+        vertices, indices, sizes, objects, materials = self.read()
+        if origin is not None:
+            vertices = vertices - np.array(origin, dtype=np.float64)
+        lines = ["ply", "format binary_little_endian 1.0"]
+        # -- The header of the OBJ becomes the comments
+        for line in ''.join(self.head).splitlines():
+            if line.startswith('#') and line.strip('# '):
+                lines.append("comment " + line.lstrip('# '))
+        for idx, name in enumerate(self.object_names):
+            lines.append("comment object %d %s" % (idx, name))
+        for idx, name in enumerate(self.material_names):
+            lines.append("comment material %d %s" % (idx, name))
+        lines += ["element vertex %d" % len(vertices),
+                  "property double x", "property double y", "property double z",
+                  "element face %d" % len(sizes)]
+        # -- Polygons (-p) may have more vertices than an uchar can count
+        if len(sizes) and sizes.max() > 255:
+            count_type = ('int', '<i4')
+        else:
+            count_type = ('uchar', 'u1')
+        lines.append("property list %s int vertex_indices" % count_type[0])
+        if self.object_names:
+            lines.append("property int object")
+        if self.material_names:
+            lines += ["property uchar red", "property uchar green", "property uchar blue"]
+        lines.append("end_header")
+
+        if self.material_names:
+            palette = np.clip(np.round(np.array(self.colours()) * 255), 0, 255).astype(np.uint8)
+            palette = np.vstack((palette, [[255, 255, 255]]))
+        with open(path, "wb") as ply_file:
+            ply_file.write(("\n".join(lines) + "\n").encode('utf-8'))
+            ply_file.write(vertices.astype('<f8').tobytes())
+            # -- The faces are written in runs of faces with the same number of vertices
+            starts = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+            runs = np.concatenate(([0], np.flatnonzero(np.diff(sizes)) + 1, [len(sizes)])).astype(np.int64)
+            for first, last in zip(runs[:-1], runs[1:]):
+                if first == last:
+                    continue
+                n = int(sizes[first])
+                fields = [('count', count_type[1]), ('indices', '<i4', (n,))]
+                if self.object_names:
+                    fields.append(('object', '<i4'))
+                if self.material_names:
+                    fields.append(('colour', 'u1', (3,)))
+                run = np.empty(last - first, dtype=fields)
+                run['count'] = n
+                run['indices'] = indices[starts[first]:starts[last]].reshape(-1, n)
+                if self.object_names:
+                    run['object'] = objects[first:last]
+                if self.material_names:
+                    run['colour'] = palette[materials[first:last]]
+                ply_file.write(run.tobytes())
@@ -34,19 +34,17 @@ from lxml import etree
 import copy
 import triangle
 import numpy as np
-import shapely
-from sklearn.decomposition import PCA
 
 
-def getAreaOfGML(poly, height=True):
-    """Function which reads <gml:Polygon> and returns its area.
+def getAreaOfGML(poly, ns, height=True):
+    """Function which reads <gml:Polygon> of a file with the name spaces ns and returns its area.
     The function also accounts for the interior and checks for the validity of the polygon."""
     exteriorarea = 0.0
     interiorarea = 0.0
     # -- Decompose the exterior and interior boundary
-    e, i = markup3dmodule.polydecomposer(poly)
+    e, i = markup3dmodule.polydecomposer(poly, ns)
     # -- Extract points in the <gml:LinearRing> of <gml:exterior>
-    epoints = markup3dmodule.GMLpoints(e[0])
+    epoints = markup3dmodule.GMLpoints(e[0], ns)
     if isPolyValid(epoints):
         if height:
             exteriorarea += get3DArea(epoints)
@@ -54,7 +52,7 @@ def getAreaOfGML(poly, height=True):
             exteriorarea += get2DArea(epoints)
     for idx, iring in enumerate(i):
         # -- Extract points in the <gml:LinearRing> of <gml:interior>
-        ipoints = markup3dmodule.GMLpoints(iring)
+        ipoints = markup3dmodule.GMLpoints(iring, ns)
         if isPolyValid(ipoints):
             if height:
                 interiorarea += get3DArea(ipoints)
@@ -123,6 +121,67 @@ def isPolyPlanar(polypoints):
     return planar
 
 
+# -- Checks of the batch validation. The result of a ring is the sum of the checks it failed, 0 if it is valid
+NOT_CLOSED = 1
+FEW_POINTS = 2
+NOT_PLANAR = 4
+REPEATED_POINTS = 8
+
+invalidityMessages = [
+    (NOT_CLOSED, "A degenerate polygon. First and last points do not match."),
+    (FEW_POINTS, "A degenerate polygon. The number of points is smaller than 3."),
+    (NOT_PLANAR, "A degenerate polygon. The points are not planar."),
+    (REPEATED_POINTS, "A degenerate polygon. There are identical points.")
+]
+
+
+def validateRings(rings, eps=0.01):
+    """Checks many rings (lists of points including the doubled first/last point) at once, in the same way
+    as isPolyValid, but without printing anything. All the points are stacked in one array, so each check is
+    done for all the rings with a few NumPy operations.
+    Returns an integer array with the failed checks of each ring (see invalidityMessages)."""
+    result = np.zeros(len(rings), dtype=np.int64)
+    if len(rings) == 0:
+        return result
+    sizes = np.array([len(ring) for ring in rings])
+    points = np.concatenate([np.asarray(ring, dtype=np.float64).reshape(-1, 3) for ring in rings])
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    ends = starts + sizes - 1
+    # -- Ring of each point and its position in the ring
+    owner = np.repeat(np.arange(len(rings)), sizes)
+    position = np.arange(len(points)) - starts[owner]
+
+    # -- Check if last point equal
+    result[(points[starts] != points[ends]).any(axis=1)] |= NOT_CLOSED
+    # -- Check if it has at least three points (four because the first point is doubled as the last one)
+    result[sizes < 4] |= FEW_POINTS
+
+    # -- Check if the points are planar: the normal from the first three points, the rest within eps of the plane.
+    # -- The normal is computed with the determinants of unit_normal on whole columns, so that it is the same to the
+    # -- last bit as the one of isPolyPlanar, and a ring without a normal (of magnitude 0) is not planar as there
+    a = points[starts]
+    b = points[np.minimum(starts + 1, ends)]
+    c = points[np.minimum(starts + 2, ends)]
+    one = np.ones(len(rings))
+    x = det([[one, a[:, 1], a[:, 2]], [one, b[:, 1], b[:, 2]], [one, c[:, 1], c[:, 2]]])
+    y = det([[a[:, 0], one, a[:, 2]], [b[:, 0], one, b[:, 2]], [c[:, 0], one, c[:, 2]]])
+    z = det([[a[:, 0], a[:, 1], one], [b[:, 0], b[:, 1], one], [c[:, 0], c[:, 1], one]])
+    magnitude = (x ** 2 + y ** 2 + z ** 2) ** .5
+    degenerate = (magnitude == 0) | (sizes < 3)
+    result[degenerate] |= NOT_PLANAR
+    magnitude[degenerate] = 1.0
+    normals = np.column_stack((x / magnitude, y / magnitude, z / magnitude))[owner]
+    vectors = points - a[owner]
+    distance = np.abs(vectors[:, 0] * normals[:, 0] + vectors[:, 1] * normals[:, 1] + vectors[:, 2] * normals[:, 2])
+    off_plane = (position >= 3) & (distance > eps) & ~degenerate[owner]
+    result[np.bincount(owner[off_plane], minlength=len(rings)) > 0] |= NOT_PLANAR
+
+    # -- Check if some of the points are repeating
+    repeated = (points[1:] == points[:-1]).all(axis=1) & (owner[1:] == owner[:-1])
+    result[np.bincount(owner[1:][repeated], minlength=len(rings)) > 0] |= REPEATED_POINTS
+    return result
+
+
 def isPolySimple(polypoints): #todo: this function has to be adapted
     """Checks if the polygon is simple, i.e. it does not have any self-intersections.
     Inspired by http://www.win.tue.nl/~vanwijk/2IV60/2IV60_exercise_3_answers.pdf"""
@@ -351,6 +410,8 @@ def centroid(list_of_points):
 # The returned point lies on the contour of the polygon sometimes, wich then messes up the triangulation
 def point_inside(list_of_points):
     """Returns a point that is guaranteed to be inside the polygon, thanks to Shapely."""
+    # -- Shapely is only loaded when it is needed
+    import shapely.geometry
     #  Th_Fr: new function that actually works
     representative_point_tmp = centroid(list_of_points)
     representative_point = shapely.geometry.Point(representative_point_tmp)
@@ -369,7 +430,7 @@ def plane(a, b, c):
 # added by Th_Fr
 def planeAdjusted(points):
     """
-    Returns the equation of a plane in three dimensions using PCA.
+    Returns the equation of a plane in three dimensions fitted with a singular value decomposition.
 
     Parameters:
     points: list of lists or numpy array of shape (n, 3)
@@ -381,24 +442,54 @@ def planeAdjusted(points):
         Parameters of the plane equation ax + by + cz + d = 0.
     """
     # Convert points to numpy array for easier manipulation
-    points = np.array(points)
+    points = np.array(points, dtype=np.float64)
 
     # Check if at least 3 points are provided
     if points.shape[0] < 3:
         raise ValueError("At least 3 points are required to define a plane.")
 
-    # Use PCA to fit the plane
-    pca = PCA(n_components=3)
-    pca.fit(points)
-    normal = pca.components_[2]  # The normal vector to the plane
+    # The normal is the direction of least variance of the centred points,
+    # i.e. the last right singular vector (the same fit as a PCA)
+    mean = points.mean(axis=0)
+    normal = np.linalg.svd(points - mean, full_matrices=False)[2][2]
 
     # Extract coefficients
     p_a, p_b, p_c = normal
-    p_d = -np.dot(normal, pca.mean_)  # Calculate d using the mean of points
+    p_d = -np.dot(normal, mean)  # Calculate d using the mean of points
 
     return p_a, p_b, p_c, p_d
 
 
+def planesAdjusted(rings):
+    """
+    Fits a plane to each ring, in the same way as planeAdjusted.
+    The rings with the same number of points are stacked and decomposed with a single NumPy call, so the planes
+    are the ones planeAdjusted fits for each of them alone (to the last bit), with one call for each size of ring.
+
+    Parameters:
+    rings: list of lists of points or of numpy arrays of shape (n, 3), n >= 3
+
+    Returns:
+    numpy array of shape (len(rings), 4) with the parameters a, b, c, d of each plane.
+    """
+    planes = np.empty((len(rings), 4))
+    sizes = {}
+    for k, ring in enumerate(rings):
+        sizes.setdefault(len(ring), []).append(k)
+    for size, members in sizes.items():
+        if size < 3:
+            raise ValueError("At least 3 points are required to define a plane.")
+        points = np.array([rings[k] for k in members], dtype=np.float64).reshape(len(members), size, 3)
+
+        # -- Centre every ring on its mean, the normal is its last right singular vector
+        means = points.mean(axis=1)
+        normals = np.linalg.svd(points - means[:, None, :], full_matrices=False)[2][:, 2]
+
+        planes[members, :3] = normals
+        planes[members, 3] = -(normals[:, None, :] @ means[:, :, None])[:, 0, 0]
+    return planes
+
+
 def get_height(plane, x, y):
     """Get the missing coordinate from the plane equation and the partial coordinates."""
     p_a, p_b, p_c, p_d = plane
@@ -517,16 +608,12 @@ def calculate_polygon_normal(polygon):
     np.array: A normalized vector representing the surface normal.
     """
 
-    normal = np.array([0.0, 0.0, 0.0])
-    num_verts = len(polygon)
-
-    for i in range(num_verts):
-        current = np.array(polygon[i])
-        next_vert = np.array(polygon[(i + 1) % num_verts])
+    current = np.asarray(polygon, dtype=np.float64).reshape(-1, 3)
+    next_vert = np.concatenate((current[1:], current[:1]))
 
-        normal[0] += (current[1] - next_vert[1]) * (current[2] + next_vert[2])
-        normal[1] += (current[2] - next_vert[2]) * (current[0] + next_vert[0])
-        normal[2] += (current[0] - next_vert[0]) * (current[1] + next_vert[1])
+    normal = np.array([((current[:, 1] - next_vert[:, 1]) * (current[:, 2] + next_vert[:, 2])).sum(),
+                       ((current[:, 2] - next_vert[:, 2]) * (current[:, 0] + next_vert[:, 0])).sum(),
+                       ((current[:, 0] - next_vert[:, 0]) * (current[:, 1] + next_vert[:, 1])).sum()])
 
     normal = normalize(normal)
     return normal
@@ -551,166 +638,285 @@ def normalize(vector):
 def triangulation(e, i):
     """Triangulate the polygon with the exterior and interior list of points. Works only for convex polygons.
     Assumes planarity. Projects to a 2D plane and goes back to 3D."""
-    vertices = []
-    holes = []
-    segments = []
-    index_point = 0
-    # -- Slope computation points
-    a = [[], [], []]
-    b = [[], [], []]
-    for ip in range(len(e) - 1):
-        vertices.append(e[ip])
-        if a == [[], [], []] and index_point == 0:
-            a = [e[ip][0], e[ip][1], e[ip][2]]
-        if index_point > 0 and (e[ip] != e[ip - 1]):
-            if b == [[], [], []]:
-                b = [e[ip][0], e[ip][1], e[ip][2]]
-        if ip == len(e) - 2:
-            segments.append([index_point, 0])
-        else:
-            segments.append([index_point, index_point + 1])
-        index_point += 1
+    pslg = projectPolygon(e, i)
+    return liftTriangles(pslg, triangulatePSLG(pslg))
+
 
+def projectPolygon(e, i, pl=None):
+    """Projects the polygon with the exterior and interior list of points to a 2D plane.
+    Returns its planar straight-line graph (vertices, segments and a point in each hole),
+    with what is needed to lift the triangles back to 3D. pl is the plane fitted to the exterior, if it is known
+    (see planesAdjusted)."""
+    # -- Each ring without its last point (identical to the first), closed by its segments
+    rings = [np.array(e[:-1], dtype=np.float64).reshape(-1, 3)]
     for hole in i:
-        first_point_in_hole = index_point
-        for p in range(len(hole) - 1):
-            if p == len(hole) - 2:
-                segments.append([index_point, first_point_in_hole])
-            else:
-                segments.append([index_point, index_point + 1])
-            index_point += 1
-            vertices.append(hole[p])
-            # -- A more robust way to get the point inside the hole, should work for non-convex interior polygons
-        # alt: holes.append(point_inside(hole[:-1]))
-        # -- Alternative, use centroid
-        holes.append(centroid(hole[:-1])) # This should be useful!
-    # -- Project to 2D since the triangulation cannot be done in 3D with the library that is used
-    npolypoints = len(vertices)
-    nholes = len(holes)
-    # -- Check if the polygon is vertical, i.e. a projection cannot be made.
-    # -- First copy the list so the originals are not modified
-    temppolypoints = copy.deepcopy(vertices)
-    newpolypoints = copy.deepcopy(vertices)
-    tempholes = copy.deepcopy(holes)
-    newholes = copy.deepcopy(holes)
+        rings.append(np.array(hole[:-1], dtype=np.float64).reshape(-1, 3))
+    vertices = np.concatenate(rings)
+    segments = np.empty((len(vertices), 2), dtype=np.int32)
+    segments[:, 0] = np.arange(len(vertices))
+    segments[:, 1] = segments[:, 0] + 1
+    start = 0
+    for ring in rings:
+        start += len(ring)
+        segments[start - 1, 1] = start - len(ring)
+    # -- A point in each hole: its centroid
+    # alt: holes.append(point_inside(hole[:-1]))
+    holes = np.array([centroid(hole[:-1]) for hole in i], dtype=np.float64).reshape(-1, 3)
 
     # -- Compute the normal of the polygon for detecting vertical polygons and
     # -- for the correct orientation of the new triangulated faces
-    # -- If the polygon is vertical
-    #normal = unit_normal(temppolypoints[0], temppolypoints[1], temppolypoints[2])
-    normal = calculate_polygon_normal(temppolypoints)
-
-    if math.fabs(normal[2]) < 10e-2:
-        vertical = True
-        #print("The polygon is vertical")
-        #print("math.fabs(normal[2]): ", math.fabs(normal[2]))
+    normal = calculate_polygon_normal(vertices)
+
+    # -- Project to 2D since the triangulation cannot be done in 3D with the library that is used.
+    # -- The coordinate that is dropped is the one lifted back from the plane afterwards:
+    # -- z for the polygons that are not vertical, and for the vertical ones the coordinate of their dominant
+    # -- horizontal normal axis, i.e. y for the ones facing north/south and x for the ones facing east/west
+    constant = None
+    if (vertices[:, 0] == vertices[0, 0]).all():
+        # -- Parallel with the YZ plane, x is the same for all the points
+        axis = 0
+        constant = vertices[0, 0]
+    elif math.fabs(normal[2]) < 10e-2:
+        if math.fabs(normal[0]) > math.fabs(normal[1]):
+            axis = 0
+        else:
+            axis = 1
     else:
-        vertical = False
-        #print("Not vertical")
-    # -- We want to project the vertical polygon to the XZ plane
-    # -- If a polygon is parallel with the YZ plane that will not be possible
+        axis = 2
+    kept = [c for c in range(3) if c != axis]
 
+    # -- Plane information (assumes planarity)
+    if pl is None:
+        pl = planeAdjusted(e)
 
-    YZ = True
-    for i in range(1, npolypoints):
-        if temppolypoints[i][0] != temppolypoints[0][0]:
-            YZ = False
-            continue
+    return {'vertices': vertices[:, kept], 'segments': segments,
+            'holes': holes[:, kept] if len(holes) > 0 else None, 'plane': pl, 'normal': normal,
+            'axis': axis, 'constant': constant}
 
 
-    # -- Project the plane in the special case
-    if YZ == True:
-        for i in range(0, npolypoints):
-            newpolypoints[i][0] = temppolypoints[i][1]
-            newpolypoints[i][1] = temppolypoints[i][2]
-        for i in range(0, nholes):
-            newholes[i][0] = tempholes[i][1]
-            newholes[i][1] = tempholes[i][2]
-    # -- Project the plane
-    elif vertical == True:
-        for i in range(0, npolypoints):
-            newpolypoints[i][1] = temppolypoints[i][2]
-        for i in range(0, nholes):
-            newholes[i][1] = tempholes[i][2]
-    else:
-        pass  # -- No changes here
+def isPSLGPackable(pslg):
+    """Checks if the planar straight-line graph is triangulated with its segments ('pQjz').
+    Polygons without holes and with duplicate points are triangulated without them, i.e. as the convex hull of
+    their points, so they cannot be packed with other polygons."""
+    return pslg['holes'] is not None or len(set(map(tuple, pslg['vertices'].tolist()))) == len(pslg['vertices'])
 
-    # -- Drop the last point (identical to first)
-    for p in newpolypoints:
-        # print("p: ", p)
-        p.pop(-1)
-        # print("p: ", p)
-    # -- If there are no holes
-    if len(newholes) == 0:
-        newholes = None
-    else:
-        counter = 0
-        for h in newholes:
-            counter = counter + 1
-            h = h.pop(-1)
-
-    # -- Plane information (assumes planarity) #todo: hier muss noch etwas angepasst werden; erledigt?
-    a = e[0]
-    b = e[1]
-    c = e[2]
-    # -- Construct the plane
-    pl = planeAdjusted(e)
 
+def triangulatePSLG(pslg):
+    """Triangulates the planar straight-line graph of one polygon with Triangle."""
     # -- Prepare the polygon to be triangulated
     # Change by Th_Fr: Distinguishing different cases!
     # There are two cases distinguished here: 1. A Polygon without holes, 2. A polygon with holes
-    if newholes == None:
-        poly = {'vertices': np.array(newpolypoints), 'segments': np.array(segments)}
+    if pslg['holes'] is None:
+        poly = {'vertices': pslg['vertices'], 'segments': pslg['segments']}
         # For some reason this if.case sometimes fails, this is why there is a second version of the
         # Trinangulation without the optional 'pQjz' parameter
-        if has_duplicates(newpolypoints) == False:
+        if isPSLGPackable(pslg):
             t = triangle.triangulate(poly, 'pQjz')
         else:
             t = triangle.triangulate(poly)
 
     else:
-        poly = {'vertices': np.array(newpolypoints), 'segments': np.array(segments), 'holes': np.array(newholes)}
+        poly = {'vertices': pslg['vertices'], 'segments': pslg['segments'], 'holes': pslg['holes']}
         t = triangle.triangulate(poly, 'pQjz')
 
     # End of changes by Th_Fr
+    return t
 
+
+def liftTriangles(pslg, t):
+    """Lifts the triangles Triangle returned for the planar straight-line graph of a polygon back to 3D,
+    with the orientation of the polygon."""
     # -- Get the triangles and their vertices
     try:
-        tris = t['triangles']
+        tris = np.asarray(t['triangles']).reshape(-1, 3)
     except:
         print("strange error")
-        tris = []
+        return []
+    try:
+        vert = np.asarray(t['vertices'], dtype=np.float64).reshape(-1, 2)
+    except:
+        return []
+
+    # -- Coordinates of the points of all the triangles, the dropped one evaluated on the plane
+    axis = pslg['axis']
+    kept = [c for c in range(3) if c != axis]
+    points = np.empty((len(tris), 3, 3))
+    points[:, :, kept[0]] = vert[tris, 0]
+    points[:, :, kept[1]] = vert[tris, 1]
+    if pslg['constant'] is not None:
+        points[:, :, axis] = pslg['constant']
+    else:
+        pl = pslg['plane']
+        points[:, :, axis] = (-pl[kept[0]] * points[:, :, kept[0]] - pl[kept[1]] * points[:, :, kept[1]] - pl[3]) / \
+                             pl[axis]
+
+    # -- Normals of the triangles; the degenerate ones (without a normal) are dropped. They are computed with the
+    # -- determinants of unit_normal on whole columns, so that slivers (e.g. at the points Triangle adds where a
+    # -- hole crosses the exterior) are dropped and oriented as with unit_normal
+    a, b, c = points[:, 0], points[:, 1], points[:, 2]
+    one = np.ones(len(points))
+    x = det([[one, a[:, 1], a[:, 2]], [one, b[:, 1], b[:, 2]], [one, c[:, 1], c[:, 2]]])
+    y = det([[a[:, 0], one, a[:, 2]], [b[:, 0], one, b[:, 2]], [c[:, 0], one, c[:, 2]]])
+    z = det([[a[:, 0], a[:, 1], one], [b[:, 0], b[:, 1], one], [c[:, 0], c[:, 1], one]])
+    magnitude = (x ** 2 + y ** 2 + z ** 2) ** .5
+    valid = magnitude != 0
+    points = points[valid]
+    tri_normals = np.column_stack((x, y, z))[valid] / magnitude[valid, None]
+    # -- Reverse the triangles whose normal does not match the one of the polygon (see compare_normals)
+    flip = (np.abs(tri_normals - pslg['normal']) > 10e-2).any(axis=1)
+    points[flip] = points[flip, ::-1]
+    return points.tolist()
+
+
+def batchTriangulation(polygons):
+    """Triangulates many polygons, given as (exterior, interiors) pairs of lists of points, with one call of
+    Triangle instead of one call for each polygon.
+    The projected polygons are moved next to each other so they do not overlap, and packed into one planar
+    straight-line graph: the vertices are offset, and the segments and points in the holes follow them.
+    Since every polygon is enclosed by its own segments, none of the other polygons is visible from its inside,
+    so its constrained Delaunay triangles are the ones it gets alone (up to the choice among cocircular points).
+    The triangles are split back to their polygons by the index of their vertices and lifted to 3D with the
+    original (not offset) coordinates. Returns the list of triangles of each polygon, empty if it failed."""
+    results = [[] for _ in polygons]
+    # -- The planes of all the exteriors are fitted at once, or one by one if one of them cannot be fitted
+    try:
+        planes = planesAdjusted([e for e, i in polygons])
+    except:
+        planes = [None] * len(polygons)
+    packed = []
+    for k, (e, i) in enumerate(polygons):
+        try:
+            pslg = projectPolygon(e, i, planes[k])
+        except:
+            continue
+        if isPSLGPackable(pslg):
+            packed.append((k, pslg))
+        else:
+            try:
+                results[k] = liftTriangles(pslg, triangulatePSLG(pslg))
+            except:
+                pass
+    if len(packed) == 0:
+        return results
+
+    # -- Pack the polygons in a row, separated by a gap as wide as the widest one
+    vertices = []
+    segments = []
+    holes = []
+    offsets = []
+    owners = []
+    start = 0
+    pslgs = [pslg for k, pslg in packed]
+    projected = [pslg['vertices'] for pslg in pslgs]
+    boxes = [(v.min(axis=0), v.max(axis=0)) for v in projected]
+    gap = max(float(np.max(upper - lower)) for lower, upper in boxes) + 1.0
+    cursor = 0.0
+    for n, pslg in enumerate(pslgs):
+        lower, upper = boxes[n]
+        offset = np.array([cursor, 0.0]) - lower
+        cursor += float(upper[0] - lower[0]) + gap
+        v = projected[n]
+        vertices.append(v + offset)
+        segments.append(pslg['segments'] + start)
+        if pslg['holes'] is not None:
+            holes.append(pslg['holes'] + offset)
+        offsets.append(offset)
+        owners.append(np.full(len(v), n))
+        start += len(v)
+    graph = {'vertices': np.concatenate(vertices), 'segments': np.concatenate(segments)}
+    if holes:
+        graph['holes'] = np.concatenate(holes)
+    owners = np.concatenate(owners)
+    starts = np.cumsum([0] + [len(v) for v in vertices])
 
     try:
-        vert = t['vertices'].tolist()
+        # -- No 'j', so the input vertices keep their index in the output
+        t = triangle.triangulate(graph, 'pQz')
+        tris = t['triangles']
+        vert = t['vertices']
     except:
-        vert = []
-    # -- Store the vertices of each triangle in a list
-    tri_points = []
-    for tri in tris:
-        tri_points_tmp = []
-        for v in tri.tolist():
-            vert_adj = [[], [], []]
-            if YZ:
-                vert_adj[0] = temppolypoints[0][0]
-                vert_adj[1] = vert[v][0]
-                vert_adj[2] = vert[v][1]
-            elif vertical:
-                vert_adj[0] = vert[v][0]
-                vert_adj[2] = vert[v][1]
-                vert_adj[1] = get_y(pl, vert_adj[0], vert_adj[2])
-            else:
-                vert_adj[0] = vert[v][0]
-                vert_adj[1] = vert[v][1]
-                vert_adj[2] = get_height(pl, vert_adj[0], vert_adj[1])
-            tri_points_tmp.append(vert_adj)
+        # -- Fall back to one call for each polygon
+        for k, pslg in packed:
             try:
-                tri_normal = unit_normal(tri_points_tmp[0], tri_points_tmp[1], tri_points_tmp[2])
+                results[k] = liftTriangles(pslg, triangulatePSLG(pslg))
             except:
-                continue
-            if compare_normals(normal, tri_normal):
-                tri_points.append(tri_points_tmp)
-            else:
-                tri_points_tmp = reverse_vertices(tri_points_tmp)
-                tri_points.append(tri_points_tmp)
-    return tri_points
+                pass
+        return results
+
+    # -- Assign each triangle to the polygon of its input vertices. Points Triangle added (where segments
+    # -- intersect) belong to the polygon of the other vertices, or of the box they fall into
+    n_input = len(owners)
+    assigned = np.full(len(tris), -1)
+    for column in range(3):
+        known = (tris[:, column] < n_input) & (assigned < 0)
+        assigned[known] = owners[tris[known, column]]
+    for idx in np.flatnonzero(assigned < 0):
+        centre = vert[tris[idx]].mean(axis=0)
+        for n, (lower, upper) in enumerate(boxes):
+            if np.all(centre - offsets[n] >= lower) and np.all(centre - offsets[n] <= upper):
+                assigned[idx] = n
+                break
+
+    order = np.argsort(assigned, kind='stable')
+    bounds = np.searchsorted(assigned[order], np.arange(len(pslgs) + 1))
+    for n, (k, pslg) in enumerate(packed):
+        own = tris[order[bounds[n]:bounds[n + 1]]]
+        local_vertices = projected[n]
+        # -- Local indices, the added points are appended to the vertices of the polygon
+        local = own - starts[n]
+        added = np.unique(own[own >= n_input])
+        if len(added) > 0:
+            local_vertices = np.vstack((local_vertices, vert[added] - offsets[n]))
+            local[own >= n_input] = len(pslg['vertices']) + np.searchsorted(added, own[own >= n_input])
+        try:
+            results[k] = liftTriangles(pslg, {'triangles': local, 'vertices': local_vertices})
+        except:
+            pass
+    return results
+
+
+def fastTriangulation(e, i, tolerance=0.001):
+    """Triangulates simple polygons without the Triangle library. A quad is split along a diagonal and a
+    convex ring is fanned from its first point, keeping the original points and the orientation of the ring.
+    The fast paths are taken only for rings without holes, which are planar within the tolerance, have no
+    repeated or collinear consecutive points and wind exactly once around their normal, since only then they
+    are a valid triangulation of the polygon. Returns the triangles and the path taken ('quad' or 'fan'),
+    or None, None if the polygon has to go through triangulation()."""
+    if len(i) > 0 or len(e) < 4:
+        return None, None
+    ring = e[:-1]
+    n = len(ring)
+    points = np.array(ring, dtype=np.float64)
+    centred = points - points.mean(axis=0)
+    # -- Newell's normal of the ring
+    normal = np.cross(centred, np.roll(centred, -1, axis=0)).sum(axis=0)
+    length = np.linalg.norm(normal)
+    if length == 0:
+        return None, None
+    normal /= length
+    # -- Planarity
+    if np.abs(centred.dot(normal)).max() > tolerance:
+        return None, None
+    # -- Edge leaving and edge arriving at each point
+    edges = np.roll(centred, -1, axis=0) - centred
+    arriving = np.roll(edges, 1, axis=0)
+    turns = np.cross(arriving, edges).dot(normal)
+    lengths = np.linalg.norm(arriving, axis=1) * np.linalg.norm(edges, axis=1)
+    # -- Repeated and collinear points
+    if (np.abs(turns) <= 1e-9 * lengths).any():
+        return None, None
+    # -- The turning angles of a simple ring add up to one full turn
+    angles = np.arctan2(turns, np.einsum('ij,ij->i', arriving, edges))
+    if math.fabs(angles.sum() - 2 * math.pi) > 1e-6:
+        return None, None
+    reflex = np.flatnonzero(turns < 0)
+    if n == 3:
+        return [list(ring)], 'fan'
+    if n == 4:
+        # -- A concave quad has to be split along the diagonal starting at its reflex point
+        k = int(reflex[0]) if len(reflex) > 0 else 0
+        return [[ring[k], ring[(k + 1) % 4], ring[(k + 2) % 4]],
+                [ring[k], ring[(k + 2) % 4], ring[(k + 3) % 4]]], 'quad'
+    if len(reflex) > 0:
+        return None, None
+    return [[ring[0], ring[j], ring[j + 1]] for j in range(1, n - 1)], 'fan'
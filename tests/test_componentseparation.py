@@ -0,0 +1,64 @@
+import math
+
+import numpy as np
+from lxml import etree
+
+import componentseparationmodule as csm
+import markup3dmodule as m3dm
+
+
+def signedVolume(faces):
+    """Volume enclosed by the triangles, positive if they are oriented outwards."""
+    t = np.array(faces)
+    return np.einsum('ij,ij->i', t[:, 0], np.cross(t[:, 1], t[:, 2])).sum() / 6.0
+
+
+def taperedOpening(sides, outer, inner, depth, angle):
+    """Points of a window whose reveal narrows from the wall surface into the wall (a frustum of a regular polygon),
+    in a vertical wall turned by angle, at the coordinates of a real model."""
+    points = []
+    for radius, d in ((outer, 0.0), (inner, depth)):
+        for k in range(sides):
+            a = 2 * math.pi * k / sides
+            x, z, y = radius * math.cos(a), radius * math.sin(a), d
+            points.append((690000.0 + x * math.cos(angle) - y * math.sin(angle),
+                           5336000.0 + x * math.sin(angle) + y * math.cos(angle), 505.0 + z))
+    return np.array(points)
+
+
+def test_hull_of_tapered_openings():
+    # -- The baseline took the 3D convex hull of the points (Open3D), a prism over the outline is too large
+    sides, outer, inner, depth = 8, 1.0, 0.7, 0.3
+    area = lambda r: 0.5 * sides * r * r * math.sin(2 * math.pi / sides)
+    expected = depth / 3.0 * (area(outer) + area(inner) + math.sqrt(area(outer) * area(inner)))
+    openings = [taperedOpening(sides, outer, inner, depth, angle) for angle in (0.0, 0.3, 2.0)]
+    for points, faces in zip(openings, csm.compute_convex_hulls(openings)):
+        assert math.isclose(signedVolume(np.array(faces) - points.mean(axis=0)), expected, rel_tol=1e-9)
+        # -- The vertices of the hull are points of the opening
+        assert set(map(tuple, np.array(faces).reshape(-1, 3).tolist())) <= set(map(tuple, points.tolist()))
+
+
+def test_hull_of_planar_opening():
+    points = taperedOpening(6, 1.0, 1.0, 0.0, 0.3)[:6]
+    faces = csm.compute_convex_hulls([points])[0]
+    # -- Both sides of the hexagon
+    assert len(faces) == 8
+    assert abs(signedVolume(np.array(faces) - points.mean(axis=0))) < 1e-9
+
+
+def test_bounding_box_in_double_precision():
+    # -- Open3D computed the box in float32, which rounds these coordinates to half units
+    x, y, z = 690000.123, 5336000.456, 500.789
+    ring = [(x, y, z), (x + 10.25, y, z), (x + 10.25, y, z + 3.5), (x, y, z + 3.5), (x, y, z)]
+    b = etree.fromstring(
+        '<bldg:Building xmlns:bldg="http://www.opengis.net/citygml/building/2.0" xmlns:gml="http://www.opengis.net/gml">'
+        '<bldg:boundedBy><bldg:WallSurface><bldg:lod2MultiSurface><gml:MultiSurface><gml:surfaceMember><gml:Polygon>'
+        '<gml:exterior><gml:LinearRing><gml:posList>%s</gml:posList></gml:LinearRing></gml:exterior>'
+        '</gml:Polygon></gml:surfaceMember></gml:MultiSurface></bldg:lod2MultiSurface></bldg:WallSurface>'
+        '</bldg:boundedBy></bldg:Building>' % " ".join("%r %r %r" % p for p in ring))
+    points = np.array(ring)
+    low, high = points.min(axis=0) - 3, points.max(axis=0) + 3
+    box = csm.getBufferedBBoxPoints(b, m3dm.Namespaces(2))
+    assert box.dtype == np.float64
+    assert np.array_equal(box[0], low) and np.array_equal(box[4], high)
+    assert not np.array_equal(low.astype(np.float32).astype(np.float64), low)
@@ -0,0 +1,215 @@
+import filecmp
+import os
+import random
+import threading
+
+import numpy as np
+import pytest
+from lxml import etree
+
+import conversionmodule as cm
+import generateCityGML
+
+
+def readFaces(path):
+    """The faces of an OBJ file as arrays of the coordinates of their vertices."""
+    vertices = []
+    faces = []
+    with open(path) as f:
+        for line in f:
+            if line.startswith('v '):
+                vertices.append([float(c) for c in line.split()[1:]])
+            elif line.startswith('f '):
+                faces.append(np.array([vertices[int(v) - 1] for v in line.split()[1:]]))
+    return faces
+
+
+def readObjects(path):
+    """The faces of an OBJ file with their object and material, as (object, material, coordinates) triples."""
+    vertices = []
+    faces = []
+    ob = material = None
+    with open(path) as f:
+        for line in f:
+            if line.startswith('v '):
+                vertices.append([float(c) for c in line.split()[1:]])
+            elif line.startswith('o '):
+                ob = line.split()[1]
+            elif line.startswith('usemtl '):
+                material = line.split()[1]
+            elif line.startswith('f '):
+                faces.append((ob, material, [vertices[int(v) - 1] for v in line.split()[1:]]))
+    return faces
+
+
+def sameOutput(first, second):
+    """Whether two conversions wrote the same files, byte for byte."""
+    names = [os.path.basename(f) for f in first.written]
+    return (names == [os.path.basename(f) for f in second.written] and
+            all(filecmp.cmp(a, b, shallow=False) for a, b in zip(first.written, second.written)))
+
+
+def listIndex(point, list_vertices):
+    """The index of a vertex as the list lookup it replaced found it."""
+    if point not in list_vertices:
+        list_vertices.append(point)
+    return list_vertices.index(point)
+
+
+def test_vertex_index_same_as_list():
+    rng = random.Random(1)
+    pool = [[round(690000.0 + rng.uniform(0, 100), 3), round(5336000.0 + rng.uniform(0, 100), 3),
+             round(500.0 + rng.uniform(0, 10), 3)] for _ in range(200)]
+    points = []
+    for k in range(2000):
+        point = list(rng.choice(pool))
+        if rng.random() < 0.2:
+            # -- A near-duplicate, far within the tolerance below
+            point[rng.randrange(3)] += 1e-6
+        points.append(point)
+    listed = []
+    index = cm.VertexIndex()
+    assert [index.add(p) for p in points] == [listIndex(p, listed) for p in points]
+    assert list(index) == listed
+    # -- With a tolerance the near-duplicate gets the index of the vertex it is close to, which is written
+    tolerant = cm.VertexIndex(0.001)
+    a = tolerant.add([690000.123, 5336000.456, 500.789])
+    assert tolerant.add([690000.123, 5336000.456 + 1e-6, 500.789]) == a
+    assert tolerant.add([690000.123, 5336000.466, 500.789]) == a + 1
+    assert tolerant[a] == [690000.123, 5336000.456, 500.789] and len(tolerant) == 2
+
+
+def test_materials_made_for_each_conversion():
+    options = cm.ConversionOptions(attribute=1, res=11)
+    first = options.for_conversion(0.0, 10.0)
+    assert first.material(5.0) == '0.5'
+    # -- The settings of the caller are left as they are, and the next conversion has its own range
+    assert options.bins is None and options.min_value is None
+    second = options.for_conversion(0.0, 100.0)
+    assert second.material(5.0) == '0.0'
+    assert first.material(5.0) == '0.5'
+
+
+def test_offset_same_as_translated_document(tmp_path):
+    path = str(tmp_path / "city.gml")
+    # -- The tenth object is a city furniture with implicit geometry
+    generateCityGML.generate(path, 10, version=2, lod=3)
+    # -- The polygons are not triangulated, Triangle may split the slightly different coordinates differently
+    translated = cm.convert(path, cm.ConversionOptions(semantics=True, skiptri=True, translate_citygml=True),
+                            str(tmp_path / "tC"))
+    offset = cm.convert(path, cm.ConversionOptions(semantics=True, skiptri=True, translate_citygml=True,
+                                                   translate_offset=True), str(tmp_path / "tCo"))
+    assert [os.path.basename(f) for f in offset.written] == [os.path.basename(f) for f in translated.written]
+    assert os.path.join(str(tmp_path / "tC"), "city-Other.obj") in translated.written
+    for a, b in zip(translated.written, offset.written):
+        if a.endswith('-Other.obj'):
+            # -- The implicit geometry of the furniture is relative to its reference point, it is not translated
+            assert filecmp.cmp(a, b, shallow=False)
+        else:
+            # -- The sums of doubles differ from the decimal-exact rewrite in the last bits
+            faces, expected = readFaces(b), readFaces(a)
+            assert len(faces) == len(expected)
+            for face, e in zip(faces, expected):
+                assert np.allclose(face, e, rtol=0, atol=1e-6)
+
+
+def readOutput(directory):
+    """Contents of the files written to a directory, by name."""
+    contents = {}
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name)) as f:
+            contents[name] = f.read()
+    return contents
+
+
+def test_conversions_in_threads(tmp_path):
+    # -- Files of different versions, read with different name spaces at the same time
+    jobs = []
+    for version in (2, 3):
+        for options in (cm.ConversionOptions(semantics=True), cm.ConversionOptions(separate_components=True)):
+            directory = tmp_path / ("v%d_%d" % (version, len(jobs)))
+            directory.mkdir()
+            path = str(directory / "city.gml")
+            generateCityGML.generate(path, 6, version=version, lod=3)
+            jobs.append((path, options, str(directory / "out")))
+    expected = []
+    for path, options, output in jobs:
+        cm.convert(path, options, output)
+        expected.append(readOutput(output))
+    for repeat in range(3):
+        for path, options, output in jobs:
+            for name in os.listdir(output):
+                os.remove(os.path.join(output, name))
+        threads = [threading.Thread(target=cm.convert, args=job) for job in jobs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert [readOutput(output) for path, options, output in jobs] == expected
+
+
+def test_attribute_range_and_materials(tmp_path):
+    path = str(tmp_path / "city.gml")
+    generateCityGML.generate(path, 6, version=2, lod=3)
+    # -- The buildings get the values of the attribute, from 200 to 700
+    tree = etree.parse(path)
+    core = "http://www.opengis.net/citygml/2.0"
+    values = {}
+    for k, b in enumerate(tree.getroot().iter('{http://www.opengis.net/citygml/building/2.0}Building')):
+        values[b.get('{http://www.opengis.net/gml}id')] = 100.0 * (k + 2)
+        etree.SubElement(b, '{%s}yearlyIrradiation' % core).text = str(100.0 * (k + 2))
+    tree.write(path)
+    plain = cm.convert(path, cm.ConversionOptions(objects=True), str(tmp_path / "plain"))
+    memory = cm.convert(path, cm.ConversionOptions(objects=True, attribute=3, res=6), str(tmp_path / "memory"))
+    streamed = cm.convert(path, cm.ConversionOptions(objects=True, attribute=3, res=6, streaming=True),
+                          str(tmp_path / "streamed"))
+    # -- The range is the same from the tree in memory as from the streaming pre-pass
+    assert filecmp.cmp(memory.written[0], streamed.written[0], shallow=False)
+    faces = readObjects(memory.written[0])
+    # -- The faces and their order are the ones without the materials
+    assert [(ob, f) for ob, material, f in faces] == [(ob, f) for ob, material, f in readObjects(plain.written[0])]
+    # -- Every face has the material of its building, the range is 200 to 700
+    assert [material for ob, material, f in faces] == ['%.1f' % ((values[ob] - 200.0) / 500.0) for ob, m, f in faces]
+    # -- usemtl is written only when the material changes
+    with open(memory.written[0]) as f:
+        assert sum(1 for line in f if line.startswith('usemtl ')) == len(values)
+
+
+def test_workers_same_as_serial(tmp_path, monkeypatch):
+    path = str(tmp_path / "city.gml")
+    generateCityGML.generate(path, 30, version=2, lod=3)
+    # -- Several batches of buildings are converted by the workers at the same time
+    monkeypatch.setattr(cm.FileConversion, 'batch_size', 4)
+    serial = cm.convert(path, cm.ConversionOptions(semantics=True), str(tmp_path / "serial"))
+    pool = cm.convert(path, cm.ConversionOptions(semantics=True, workers=2), str(tmp_path / "pool"))
+    assert len(serial.written) > 1 and sameOutput(serial, pool)
+
+
+def test_file_workers_same_as_serial(tmp_path):
+    directory = tmp_path / "input"
+    directory.mkdir()
+    for k, version in enumerate((1, 2, 3)):
+        generateCityGML.generate(str(directory / ("city%d.gml" % k)), 5 + 5 * k, version=version, lod=3, seed=k)
+    serial = cm.convert(str(directory), cm.ConversionOptions(semantics=True), str(tmp_path / "serial"))
+    files = cm.convert(str(directory), cm.ConversionOptions(semantics=True, file_workers=2), str(tmp_path / "files"))
+    # -- The files are converted starting with the largest one, so they are written in another order
+    serial.written.sort()
+    files.written.sort()
+    assert len(serial.written) > 3 and sameOutput(serial, files)
+
+
+def test_file_workers_rejected_with_component_separation(tmp_path):
+    path = str(tmp_path / "city.gml")
+    generateCityGML.generate(path, 2, version=2, lod=3)
+    with pytest.raises(ValueError):
+        cm.convert(path, cm.ConversionOptions(separate_components=True, file_workers=2), str(tmp_path / "out"))
+    assert not (tmp_path / "out").exists() or not os.listdir(str(tmp_path / "out"))
+
+
+def test_streaming_same_as_in_memory(tmp_path):
+    path = str(tmp_path / "city.gml")
+    generateCityGML.generate(path, 30, version=2, lod=3)
+    for options in ({'semantics': True}, {'objects': True, 'translate': True}):
+        memory = cm.convert(path, cm.ConversionOptions(**options), str(tmp_path / "memory"))
+        streamed = cm.convert(path, cm.ConversionOptions(streaming=True, **options), str(tmp_path / "streamed"))
+        assert len(memory.written) > 1 and sameOutput(memory, streamed), options
@@ -0,0 +1,27 @@
+import os
+
+import conversionmodule as cm
+import generateCityGML
+
+
+def test_semantic_classes_of_every_version(tmp_path):
+    for version in (1, 2, 3):
+        directory = tmp_path / ("v%d" % version)
+        directory.mkdir()
+        path = str(directory / "city.gml")
+        generateCityGML.generate(path, 4, version=version, lod=3)
+        cm.convert(path, cm.ConversionOptions(semantics=True), str(directory))
+        for cl in ('GroundSurface', 'RoofSurface', 'WallSurface', 'Window', 'Door'):
+            with open(os.path.join(str(directory), "city-%s.obj" % cl)) as f:
+                assert any(line.startswith('f ') for line in f), (version, cl)
+
+
+def test_construction_module_of_3(tmp_path):
+    # -- The thematic surfaces and the openings of CityGML 3.0 are in the construction module
+    path = str(tmp_path / "city.gml")
+    generateCityGML.generate(path, 4, version=3, lod=3)
+    with open(path) as f:
+        text = f.read()
+    for tag in ('con:WallSurface', 'con:fillingSurface', 'con:WindowSurface', 'con:DoorSurface'):
+        assert '<' + tag in text, tag
+    assert '<bldg:WallSurface' not in text and '<bldg:opening' not in text
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+from lxml import etree
+
+import markup3dmodule as m3dm
+
+GML = 'http://www.opengis.net/gml'
+
+
+def listPoints(ring):
+    """The points of a ring as the per-coordinate parsing GMLpointsArray replaced read them."""
+    points = []
+    posList = ring.findall('.//{%s}posList' % GML)
+    texts = [posList[0].text] if posList else [p.text for p in ring.findall('.//{%s}pos' % GML)]
+    if not texts:
+        return None
+    for text in texts:
+        coords = text.split()
+        assert (len(coords) % 3 == 0)
+        for i in range(0, len(coords), 3):
+            points.append([float(coords[i]), float(coords[i + 1]), float(coords[i + 2])])
+    return points
+
+
+def ring(coords, dimension=3, posList=True):
+    """A <gml:LinearRing> of the coordinates, in a <gml:posList> or in a <gml:pos> for each point."""
+    element = etree.Element('{%s}LinearRing' % GML)
+    if posList:
+        etree.SubElement(element, '{%s}posList' % GML).text = ' '.join(coords)
+    else:
+        for i in range(0, len(coords), dimension):
+            etree.SubElement(element, '{%s}pos' % GML).text = ' '.join(coords[i:i + dimension])
+    return element
+
+
+def test_points_same_as_list():
+    ns = m3dm.Namespaces(2)
+    rng = random.Random(1)
+    for k in range(300):
+        coords = []
+        for c in range(3 * rng.randint(3, 12)):
+            coords.append(rng.choice(['%d', '%.3f', '%.14f', '%.6e']) % (rng.choice([-1, 1]) * rng.uniform(0, 1e7)))
+        for posList in (True, False):
+            r = ring(coords, posList=posList)
+            assert m3dm.GMLpointsArray(r, ns).tolist() == listPoints(r)
+            assert m3dm.GMLpoints(r, ns) == listPoints(r)
+    assert m3dm.GMLpointsArray(etree.Element('{%s}LinearRing' % GML), ns) is None
+
+
+def test_2d_points_rejected():
+    ns = m3dm.Namespaces(2)
+    # -- Six 2D points have a multiple of three coordinates, but no <gml:pos> has whole 3D points
+    coords = ['%d' % c for c in range(12)]
+    for r in (ring(coords[:8], 2), ring(coords, 2, False)):
+        with pytest.raises(AssertionError):
+            listPoints(r)
+        with pytest.raises(AssertionError):
+            m3dm.GMLpointsArray(r, ns)
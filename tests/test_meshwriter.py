@@ -0,0 +1,44 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+import conversionmodule as cm
+import generateCityGML
+
+
+def readGlb(path):
+    """The glTF of a GLB file and the triangles of each node of a class, as indices to its positions."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    length = struct.unpack('<I', data[12:16])[0]
+    gltf = json.loads(data[20:20 + length])
+    binary = data[20 + length + 8:]
+    triangles = {}
+    for child in gltf['nodes'][0]['children']:
+        node = gltf['nodes'][child]
+        triangles[node['name']] = []
+        for mesh in node['children']:
+            for primitive in gltf['meshes'][gltf['nodes'][mesh]['mesh']]['primitives']:
+                view = gltf['bufferViews'][gltf['accessors'][primitive['indices']]['bufferView']]
+                triangles[node['name']].append(np.frombuffer(
+                    binary[view['byteOffset']:view['byteOffset'] + view['byteLength']], dtype=np.uint32).reshape(-1, 3))
+    return gltf, dict((name, np.concatenate(t)) for name, t in triangles.items())
+
+
+def test_one_glb_with_the_classes(tmp_path):
+    path = str(tmp_path / "city.gml")
+    generateCityGML.generate(path, 4, version=2, lod=3)
+    obj = tmp_path / "obj"
+    cm.convert(path, cm.ConversionOptions(semantics=True), str(obj))
+    # -- The polygons of -p are triangulated as without it
+    glb = tmp_path / "glb"
+    result = cm.convert(path, cm.ConversionOptions(semantics=True, skiptri=True, output_format='glb'), str(glb))
+    assert result.written == [os.path.join(str(glb), "city.glb")]
+    triangles = readGlb(result.written[0])[1]
+    for name in os.listdir(str(obj)):
+        cl = os.path.splitext(name)[0].partition('-')[2] or 'city'
+        with open(os.path.join(str(obj), name)) as f:
+            faces = sum(1 for line in f if line.startswith('f '))
+        assert len(triangles[cl]) == faces, cl
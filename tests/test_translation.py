@@ -0,0 +1,60 @@
+import os
+import random
+from decimal import Decimal
+
+from lxml import etree
+
+import CityGMLTranslation as cgt
+import generateCityGML
+import markup3dmodule as m3dm
+
+
+def offsets(y, x, z):
+    return [cgt.fixedPoint(Decimal(y)), cgt.fixedPoint(Decimal(x)), cgt.fixedPoint(Decimal(z))]
+
+
+def test_translate_coordinates():
+    result = cgt.translateCoordinates('5336000.847 690000.134 500.0 5336009.868 690013.953 500.000',
+                                      offsets('-5336000', '-690000', '0'))
+    assert result == '0.847 0.134 500.0 9.868 13.953 500.000'
+
+
+def test_high_precision_coordinate_with_large_offset():
+    # -- Scaled to 14 positions after the comma, the offset does not fit into an int64
+    result = cgt.translateCoordinates('0.12345678901234 1.5 2', offsets('-5336000', '-690000', '0'))
+    assert result == '-5335999.87654321098766 -689998.5 2'
+
+
+def test_same_as_decimal():
+    rng = random.Random(1)
+    trans = offsets('-5336000', '-690000.25', '-12.5')
+    for k in range(200):
+        points = []
+        for c in range(9):
+            integer = rng.randint(0, 10 ** rng.randint(0, 9))
+            points.append('%s%d.%s' % (rng.choice(['', '-']), integer,
+                                       ''.join(rng.choice('0123456789') for d in range(rng.randint(1, 15)))))
+        text = ' '.join(points)
+        assert cgt.translateCoordinates(text, trans) == cgt.translateCoordinatesDecimal(text.split(), trans)
+
+
+def test_streaming_same_as_in_memory(tmp_path):
+    for version in (2, 3):
+        path = str(tmp_path / ("city%d.gml" % version))
+        # -- The tenth object is a city furniture with implicit geometry
+        generateCityGML.generate(path, 10, version=version, lod=3)
+        ns = m3dm.Namespaces(version)
+        memory = tmp_path / ("memory%d" % version)
+        streaming = tmp_path / ("streaming%d" % version)
+        memory.mkdir()
+        streaming.mkdir()
+        CITYGML = etree.parse(path)
+        cgt.translateToLocalCRS(CITYGML, "city", CITYGML.getroot(), ns['bldg'], ns['gml'], ns['citygml'], ns['frn'],
+                                ns['veg'], str(tmp_path), localDirectory=os.path.join(str(memory), ''))
+        written = cgt.translateToLocalCRSStreaming(path, "city", ns['gml'], ns['citygml'], str(tmp_path),
+                                                   localDirectory=os.path.join(str(streaming), ''))
+        assert written == os.path.join(str(streaming), "city_local_.gml")
+        expected = etree.tostring(etree.parse(os.path.join(str(memory), "city_local_.gml")), method='c14n')
+        assert etree.tostring(etree.parse(written), method='c14n') == expected
+        # -- The coordinates were translated
+        assert expected != etree.tostring(etree.parse(path), method='c14n')
@@ -0,0 +1,110 @@
+import random
+
+import numpy as np
+
+import polygon3dmodule as p3d
+
+
+def randomRings(count, seed=1):
+    rng = random.Random(seed)
+    rings = []
+    for k in range(count):
+        x, y, z = 690000.0 + rng.uniform(0, 500), 5336000.0 + rng.uniform(0, 500), 500.0 + rng.uniform(0, 20)
+        ring = [(x + rng.uniform(0, 10), y + rng.uniform(0, 10), z + rng.uniform(0, 5))
+                for _ in range(rng.randint(3, 8))]
+        rings.append(ring + [ring[0]])
+    return rings
+
+
+def test_planes_same_as_one_by_one():
+    rings = randomRings(200)
+    planes = p3d.planesAdjusted(rings)
+    for ring, plane in zip(rings, planes):
+        assert np.array_equal(plane, p3d.planeAdjusted(ring))
+
+
+def test_crossing_hole_same_as_baseline():
+    # -- A hole which crosses the top of a wall facing south: Triangle adds a point where they cross, and the
+    # -- sliver next to it is oriented by its unit_normal, as in the per-vertex implementation
+    x, y, z = 690009.4837078322, 5336000.094837078, 509.98763801912446
+    x2, y2, z2 = 690013.6632958779, 5336000.136632958, 511.28380877414213
+    e = [[690000, 5336000.0, 500], [690010, 5336000.1, 500], [690010, 5336000.1, 510], [690000, 5336000.0, 510],
+         [690000, 5336000.0, 500]]
+    i = [[[x, y, z], [x, y, z2], [x2, y2, z2], [x2, y2, z], [x, y, z]]]
+    a, b = [690000.0, 5336000.0, 500.0], [690010.0, 5336000.1, 500.0]
+    c, d = [690010.0, 5336000.1, 510.0], [690000.0, 5336000.0, 510.0]
+    expected = [[a, [x, y, z], d], [[x, y, z], a, b], [[x, y, 510.0], c, [x, y, z]], [d, [x, y, z], [x, y, 510.0]],
+                [b, [690010.0, 5336000.1, z], [x, y, z]], [c, [x, y, z], [690010.0, 5336000.1, z]]]
+    assert p3d.triangulation(e, i) == expected
+
+
+def vectorArea(triangles):
+    """Sum of the vector areas of the triangles, and the sum of their areas."""
+    t = np.array(triangles, dtype=np.float64).reshape(-1, 3, 3)
+    t -= t[0, 0]
+    cross = np.cross(t[:, 1] - t[:, 0], t[:, 2] - t[:, 0]) / 2.0
+    return cross.sum(axis=0), np.linalg.norm(cross, axis=1).sum()
+
+
+def randomPolygon(rng, sides, radii=(1.0, 6.0)):
+    """A polygon which is star-shaped around its centre, in a random plane at the coordinates of a real model.
+    Its points are at random angles, so it can be convex or not, and it winds either way."""
+    normal = np.array([rng.uniform(-1, 1), rng.uniform(-1, 1), rng.uniform(-1, 1)])
+    normal /= np.linalg.norm(normal)
+    u = np.cross(normal, [0.0, 0.0, 1.0] if abs(normal[2]) < 0.9 else [1.0, 0.0, 0.0])
+    u /= np.linalg.norm(u)
+    v = np.cross(normal, u)
+    centre = np.array([690000.0 + rng.uniform(0, 500), 5336000.0 + rng.uniform(0, 500), 500.0 + rng.uniform(0, 20)])
+    angles = sorted(rng.uniform(0, 2 * np.pi) for _ in range(sides))
+    if rng.random() < 0.5:
+        angles = angles[::-1]
+    radius = [rng.uniform(*radii) for _ in range(sides)]
+    return centre, u, v, [(centre + r * np.cos(a) * u + r * np.sin(a) * v).tolist() for r, a in zip(radius, angles)]
+
+
+def test_fast_paths_same_area_as_triangle():
+    rng = random.Random(7)
+    paths = {'quad': 0, 'fan': 0, None: 0}
+    for k in range(2000):
+        sides = rng.choice([3, 4, 4, 5, 6, 8, 12])
+        # -- Equal radii give convex polygons, the fan path has to be taken for them too
+        radii = (3.0, 3.0) if rng.random() < 0.3 else (1.0, 6.0)
+        centre, u, v, ring = randomPolygon(rng, sides, radii)
+        e = ring + [ring[0]]
+        t, path = p3d.fastTriangulation(e, [])
+        paths[path] += 1
+        if t is None:
+            continue
+        assert len(t) == sides - 2
+        area, total = vectorArea(t)
+        # -- liftTriangles orients the triangles with the determinants of unit_normal, which lose the digits of
+        # -- slivers at the coordinates of a real model, so Triangle triangulates the ring moved to the origin
+        expected, expectedTotal = vectorArea(p3d.triangulation((np.array(e) - centre).tolist(), []))
+        assert np.allclose(area, expected, rtol=0, atol=1e-7 * expectedTotal), (path, e)
+        # -- The triangles do not overlap and are not flipped
+        assert np.isclose(total, expectedTotal, rtol=1e-7), (path, e)
+    assert min(paths.values()) > 100, paths
+
+
+def test_batch_same_as_one_by_one():
+    rng = random.Random(8)
+    for batch in range(20):
+        polygons = []
+        for k in range(rng.randint(1, 40)):
+            centre, u, v, ring = randomPolygon(rng, rng.choice([3, 4, 5, 6, 8, 12, 20]))
+            e = ring + [ring[0]]
+            i = []
+            if rng.random() < 0.3:
+                # -- A hole inside the star, winding the other way
+                hole = [(centre + 0.3 * (np.array(p) - centre)).tolist() for p in ring[::-1]]
+                i = [hole + [hole[0]]]
+            polygons.append((e, i))
+        results = p3d.batchTriangulation(polygons)
+        assert len(results) == len(polygons)
+        for (e, i), t in zip(polygons, results):
+            expected = p3d.triangulation(e, i)
+            assert len(t) == len(expected), (e, i)
+            area, total = vectorArea(t)
+            expectedArea, expectedTotal = vectorArea(expected)
+            assert np.allclose(area, expectedArea, rtol=0, atol=1e-7 * expectedTotal), (e, i)
+            assert np.isclose(total, expectedTotal, rtol=1e-7), (e, i)
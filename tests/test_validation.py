@@ -0,0 +1,45 @@
+import random
+
+import numpy as np
+
+import polygon3dmodule as p3d
+
+
+def degenerateRings():
+    a, b, c, d = (0.0, 0.0, 0.0), (4.0, 0.0, 0.0), (4.0, 3.0, 0.0), (0.0, 3.0, 0.0)
+    rings = [
+        [a, b, c, d, a],
+        # -- The third point is the first one, so the first three points have no normal
+        [a, b, a, c, d, a],
+        [a, b, a],
+        [a, a, b, c, a],
+        # -- Collinear first three points
+        [a, (2.0, 0.0, 0.0), b, c, a],
+        [a, b, c, (0.0, 3.0, 0.5), a],
+        [a, b, c, d],
+        [a, b],
+    ]
+    # -- Nearly collinear and repeated points with the coordinates of a real model
+    rng = random.Random(1)
+    for k in range(300):
+        p = (690000.0 + rng.uniform(0, 100), 5336000.0 + rng.uniform(0, 100), 500.0 + rng.uniform(0, 10))
+        q = (p[0] + rng.choice([0.0, 1e-7, 3.0]), p[1] + rng.choice([0.0, 1e-7, 2.0]), p[2])
+        r = (2 * q[0] - p[0] + rng.choice([0.0, 1e-9, 1.0]), 2 * q[1] - p[1], p[2] + rng.choice([0.0, 0.005, 0.5]))
+        s = (p[0], p[1] + rng.choice([0.0, 4.0]), p[2] + rng.choice([0.0, 0.02]))
+        rings.append(rng.choice([[p, q, r, s, p], [p, q, p, r, p], [p, q, r, p], [p, q, q, r, s, p]]))
+    return rings
+
+
+def test_same_as_isPolyValid():
+    rings = degenerateRings()
+    checks = p3d.validateRings(rings)
+    for ring, check in zip(rings, checks.tolist()):
+        assert (check == 0) == p3d.isPolyValid(ring, False), ring
+        assert bool(check & p3d.NOT_PLANAR) == (not p3d.isPolyPlanar(ring)), ring
+
+
+def test_no_normal_is_not_planar():
+    a, b, c = (0.0, 0.0, 0.0), (4.0, 0.0, 0.0), (4.0, 3.0, 0.0)
+    checks = p3d.validateRings([[a, b, a, c, a]])
+    assert checks[0] & p3d.NOT_PLANAR
+    assert np.array_equal(p3d.validateRings([[a, b, c, a]]), [0])